@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from src.agents.closers.match_verifier import MatchVerificationInput, MatchVerifier
 from src.agents.Code2Text.agent import Code2TextAgent
 from src.neo4j_graph.graph import Graph
+from src.utils.metrics import get_metrics
 
 
 class Code2TextOutput(BaseModel):
@@ -33,6 +34,11 @@ class Code2Text:
             self.verifier = MatchVerifier(self.agent.graph)
 
     async def __call__(self, code: str) -> Code2TextOutput:
+        # The generation and the verifier count in the same run summary
+        with get_metrics().run("Code2Text"):
+            return await self._generate(code)
+
+    async def _generate(self, code: str) -> Code2TextOutput:
         synth_data_gen_output = await self.agent(code=code)
         print("agent output ", synth_data_gen_output)
         print(type(synth_data_gen_output))
@@ -44,9 +50,9 @@ class Code2Text:
                 proposed_confidence=1,
             )
             verification_result = await self.verifier(match_verifier_input)
-            verifier_decision = verification_result.final_output.is_match
-            verifier_confidence = verification_result.final_output.confidence
-            verifier_explanation = verification_result.final_output.explanation
+            verifier_decision = verification_result.is_match
+            verifier_confidence = verification_result.confidence
+            verifier_explanation = verification_result.explanation
         else:
             verifier_decision = None
             verifier_confidence = None
@@ -1,9 +1,11 @@
 import logging
+from typing import Optional
 
 from src.agents.closers.code_chooser import CodeChooser
 from src.agents.closers.match_verifier import MatchVerificationInput
 from src.agents.Text2Code.classifiers.base_classifier import BaseClassifier
 from src.neo4j_graph.graph import Graph
+from src.utils.metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +21,19 @@ class AgenticRAGClassifier(BaseClassifier):
 
     """
 
-    def __init__(self, graph: Graph, top_k):
+    def __init__(self, graph: Graph, top_k, retrieval: Optional[str] = None):
         super().__init__(graph)
         self.top_k = top_k
+        # "vector", "hybrid" (keyword + vector fusion) or "two_stage" (coarse codes, then
+        # FINAL codes in their subtrees); None uses the graph's search_mode
+        self.retrieval = retrieval
         self.code_chooser = CodeChooser(graph, num_choices=top_k)
 
     async def __call__(self, activity: str) -> str:
+        with get_metrics().run(self.get_agent_name()):
+            return await self._classify(activity)
+
+    async def _classify(self, activity: str) -> MatchVerificationInput:
         closest_codes = await self.get_closest_codes(activity)
         logger.info(f"Closest codes for activity '{activity}': {closest_codes}")
         code_choice_result = await self.code_chooser(activity=activity, codes=closest_codes)
@@ -36,8 +45,8 @@ class AgenticRAGClassifier(BaseClassifier):
             activity=activity,
             code=code_choice_result.chosen_code,
             proposed_explanation=code_choice_result.explanation,
-        )
             proposed_confidence=code_choice_result.confidence,  # confidence from CodeChoice
+        )
 
         return result
 
@@ -48,7 +57,7 @@ class AgenticRAGClassifier(BaseClassifier):
         return None
 
     async def get_closest_codes(self, activity):
-        return await self.graph.get_closest_codes(activity, top_k=self.top_k)
+        return await self.graph.get_closest_codes(activity, top_k=self.top_k, mode=self.retrieval)
 
     def build_prompt(self):
         return None
@@ -1,21 +1,88 @@
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from src.agents.closers.match_verifier import MatchVerificationInput
 from src.agents.Text2Code.classifiers.base_classifier import BaseClassifier
+from src.navigator.beam import BeamSearch
+from src.utils.metrics import get_metrics, span
+
+logger = logging.getLogger(__name__)
 
 
 class NavigatorAgenticClassifier(BaseClassifier):
-    def __init__(self, navigator):
+    """
+    The agent navigates the hierarchy with tools until it reaches a FINAL code.
+
+    With beam search (opt-in, NAVIGATOR_BEAM_SEARCH=true), the descent is first driven by
+    embedding similarity: the LLM is only called when children are too close to call, and
+    starts its navigation at that node. Easy activities are classified without any LLM
+    turn; their confidence is then the similarity of the code reached, not a calibrated
+    probability. With the navigator's warm start, runs that
+    would start at the root begin at a pre-selected division or group instead.
+    """
+
+    def __init__(self, navigator, use_beam_search: Optional[bool] = None):
         super().__init__(navigator)
+        if use_beam_search is None:
+            use_beam_search = os.environ.get("NAVIGATOR_BEAM_SEARCH", "false").lower() == "true"
+        self.beam_search: Optional[BeamSearch] = (
+            BeamSearch(navigator, root=navigator.root) if use_beam_search else None
+        )
+
+    async def __call__(self, activity: str):
+        with get_metrics().run(self.get_agent_name()):
+            return await self._classify(activity)
+
+    async def _classify(self, activity: str):
+        if self.beam_search is None:
+            # Each run navigates in its own session, so the classifier can be shared
+            path = await self.graph.warm_start_path(activity) if self.graph.warm_start else None
+            with self.graph.start_session(path=path):
+                return await super().__call__(activity)
+
+        with span("navigator:beam_search"):
+            beam = await self.beam_search(activity)
+        if beam.resolved:
+            return MatchVerificationInput(
+                activity=activity,
+                code=beam.code,
+                proposed_explanation=(
+                    "Descente automatique par similarité d'embeddings : "
+                    + " → ".join(beam.path[1:])
+                ),
+                proposed_confidence=round(beam.score, 4),
+            )
+
+        # Ambiguous: the agent takes over where the children were too close to call
+        path = beam.path
+        if len(path) == 1 and self.graph.warm_start:
+            path = await self.graph.warm_start_path(activity)
+        with self.graph.start_session(path=path):
+            return await super().__call__(activity, beam.candidates)
 
     def get_agent_name(self) -> str:
         return "Navigator Agentic Classifier"
 
-    def build_prompt(self, query: str) -> str:
-        return f"""
+    def build_prompt(self, query: str, candidates: Optional[List[Tuple[str, float]]] = None) -> str:
+        prompt = f"""
         Vous êtes un classificateur NACE.
 
         Activité à classifier : {query}
 
         Votre mission : Naviguer dans la hiérarchie NACE pour trouver le code le plus spécifique et approprié.
         """
+        if self.graph.current_code != self.graph.root:
+            prompt += f"""
+        Position de départ : {self.graph.current_code} (présélectionnée par similarité ; si elle
+        ne convient pas, remontez avec go_to_parent ou reset_to_root)
+        """
+        if candidates:
+            codes = ", ".join(code for code, _ in candidates)
+            prompt += f"""
+        Codes les plus proches par similarité (trop proches pour trancher) : {codes}
+        """
+        return prompt
 
     def get_instructions(self) -> str:
         return """
@@ -25,4 +92,4 @@ class NavigatorAgenticClassifier(BaseClassifier):
         vous renverrez votre position. 
         Si vous n'avez pas réussi à atteindre une position finale, dites-le. 
         Soyez méthodique et justifiez chaque choix !
-        """
\ No newline at end of file
+        """
@@ -4,6 +4,7 @@ from pydantic import BaseModel, Field
 
 from src.agents.closers.match_verifier import MatchVerificationInput, MatchVerifier
 from src.agents.Text2Code.classifiers.base_classifier import BaseClassifier
+from src.utils.metrics import get_metrics
 
 
 class Text2CodeOutput(BaseModel):
@@ -36,6 +37,11 @@ class Text2Code:
             self.verifier = MatchVerifier(self.classifier.graph)
 
     async def __call__(self, activity: str) -> Text2CodeOutput:
+        # The classifier and the verifier count in the same run summary
+        with get_metrics().run("Text2Code"):
+            return await self._classify(activity)
+
+    async def _classify(self, activity: str) -> Text2CodeOutput:
         classifier_output = await self.classifier(activity=activity)
 
         if hasattr(self, "verifier"):
@@ -43,9 +49,9 @@ class Text2Code:
                 raise ValueError("The classifier should return a MatchVerifierInput type.")
 
             verification_result = await self.verifier(classifier_output)
-            verifier_decision = verification_result.final_output.is_match
-            verifier_confidence = verification_result.final_output.confidence
-            verifier_explanation = verification_result.final_output.explanation
+            verifier_decision = verification_result.is_match
+            verifier_confidence = verification_result.confidence
+            verifier_explanation = verification_result.explanation
         else:
             verifier_decision = None
             verifier_confidence = None
@@ -2,6 +2,7 @@ import logging
 import os
 from abc import ABC, abstractmethod
 
+from agents.model_settings import ModelSettings
 from dotenv import load_dotenv
 from langfuse.openai import AsyncOpenAI
 from pydantic import BaseModel
@@ -13,8 +14,8 @@ from agents import (
     set_default_openai_client,
     set_tracing_disabled,
 )
-from agents.model_settings import ModelSettings
 from src.neo4j_graph.graph import Graph
+from src.utils.metrics import count, get_metrics, span
 
 logger = logging.getLogger(__name__)
 
@@ -61,16 +62,25 @@ class BaseAgent(ABC):
     @abstractmethod
     def build_prompt(self, *args, **kwargs) -> str:
         pass
-    
+
     async def __call__(self, *args, **kwargs):
-        prompt = self.build_prompt(*args, **kwargs)
-        result = await Runner.run(
-            self.agent,
-            prompt, 
-            max_turns=int(os.environ["MAX_TURNS"])) 
+        with get_metrics().run(self.get_agent_name()):
+            prompt = self.build_prompt(*args, **kwargs)
+            result = await self.run_agent(prompt, max_turns=int(os.environ["MAX_TURNS"]))
         logger.info(f"Result of the __call__ in BaseAgent: \n {result.final_output}")
         return result.final_output
 
+    async def run_agent(self, prompt: str, **kwargs):
+        """Runner.run on the agent, timed, with its LLM turns and tokens in the metrics."""
+        name = self.get_agent_name()
+        with span(f"agent:{name}"):
+            result = await Runner.run(self.agent, prompt, **kwargs)
+        usage = result.context_wrapper.usage
+        count("llm_turns", usage.requests, agent=name)
+        count("input_tokens", usage.input_tokens, agent=name)
+        count("output_tokens", usage.output_tokens, agent=name)
+        return result
+
     def get_model_settings(self) -> ModelSettings:
         return ModelSettings(
             temperature=0,
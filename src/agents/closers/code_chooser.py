@@ -1,6 +1,5 @@
 from pydantic import BaseModel, Field
 
-from agents import Runner
 from src.agents.base_agent import BaseAgent
 from src.neo4j_graph.graph import Graph
 
@@ -27,7 +26,7 @@ class CodeChooser(BaseAgent):
             raise ValueError(f"Expected {self.num_choices} codes, got {len(codes)}")
 
         prompt = self.build_prompt(activity, codes)
-        result = await Runner.run(self.agent, prompt)
+        result = await self.run_agent(prompt)
 
         return result
 
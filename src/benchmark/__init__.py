@@ -0,0 +1,9 @@
+import os
+
+# The benchmark runs offline: the agents and tools modules read these settings at import
+# time, but no request ever reaches these endpoints (see ScriptedModel and FixtureGraph)
+os.environ.setdefault("OPENAI_BASE_URL", "http://localhost:0/v1")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("GENERATION_MODEL", "benchmark-scripted")
+os.environ.setdefault("MAX_TURNS", "20")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
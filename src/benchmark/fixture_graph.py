@@ -0,0 +1,147 @@
+import json
+import os
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.navigator.navigator import Navigator
+from src.neo4j_graph.graph import Graph
+from src.neo4j_graph.hierarchy import ROOT_CODE
+from src.neo4j_graph.local_index import LocalVectorIndex
+from src.neo4j_graph.snapshot import FIELDS, NomenclatureSnapshot
+from src.neo4j_graph.text_index import tokenize
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURE_PATH = os.path.join(FIXTURES_DIR, "nomenclature.json")
+SCRIPTS_PATH = os.path.join(FIXTURES_DIR, "scripts.json")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings (hashed word tokens), computed locally."""
+
+    def __init__(self, dims: int = 256):
+        self.dims = dims
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for token in tokenize(text):
+            vector[zlib.crc32(token.encode()) % self.dims] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class Fixture:
+    """Nomenclature tree of a fixture file, with its snapshot and local vector index."""
+
+    def __init__(self, path: str = FIXTURE_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.version: str = data["version"]
+        self.activities: List[str] = data["activities"]
+        self.embeddings = HashingEmbeddings()
+
+        nodes = [{"code": ROOT_CODE, "parent": None, "name": "", "description": ""}]
+        nodes += data["nodes"]
+        index = {node["code"]: i for i, node in enumerate(nodes)}
+        parents = [index[node["parent"]] if node["parent"] else -1 for node in nodes]
+        has_children = {node["parent"] for node in nodes}
+
+        levels: Dict[str, int] = {ROOT_CODE: 0}
+        for node in nodes[1:]:
+            levels[node["code"]] = levels[node["parent"]] + 1
+
+        def record(node: Dict[str, Any]) -> tuple:
+            values = {
+                **node,
+                "level": levels[node["code"]],
+                "final": int(node["code"] not in has_children),
+            }
+            return tuple(values.get(field) for field in FIELDS)
+
+        self.snapshot = NomenclatureSnapshot(self.version, [record(n) for n in nodes], parents)
+
+        # Every node but the root has an embedding, as written by the graph builder
+        rows = sorted(range(1, len(nodes)), key=lambda i: self.snapshot.pre[i])
+        self.final_codes = [nodes[i]["code"] for i in rows if nodes[i]["code"] not in has_children]
+        self.index = LocalVectorIndex(
+            [nodes[i]["code"] for i in rows],
+            np.array(
+                self.embeddings.embed_documents(
+                    [f"{nodes[i]['name']} {nodes[i]['description']}" for i in rows]
+                )
+            ),
+            levels=[levels[nodes[i]["code"]] for i in rows],
+            final=[nodes[i]["code"] not in has_children for i in rows],
+            pre=[self.snapshot.pre[i] for i in rows],
+        )
+
+
+@lru_cache(maxsize=None)
+def load_fixture(path: str = FIXTURE_PATH) -> Fixture:
+    return Fixture(path)
+
+
+def load_scripts(path: str = SCRIPTS_PATH) -> Dict[str, List[Dict[str, Any]]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FixtureGraph(Graph):
+    """
+    Graph answering every lookup and search from a fixture, without Neo4j nor an
+    embedding API: the snapshot serves the lookups, the local index the vector searches.
+    Only the backend hooks are overridden, the rest goes through Graph.__init__.
+    """
+
+    def __init__(
+        self,
+        neo4j_config=None,
+        fixture_path: str = FIXTURE_PATH,
+        search_mode: Optional[str] = "vector",
+        **graph_kwargs,
+    ) -> None:
+        self.fixture = load_fixture(fixture_path)
+        graph_kwargs.setdefault("nomenclature_version", self.fixture.version)
+        graph_kwargs.setdefault("embedding_cache_path", None)
+        super().__init__(
+            neo4j_config, snapshot=True, retriever="local", search_mode=search_mode, **graph_kwargs
+        )
+
+    def _connect(self, neo4j_config) -> None:
+        return None
+
+    def _embedding_api(self) -> Tuple[str, Embeddings]:
+        return "fixture-hashing", self.fixture.embeddings
+
+    def _vector_store(self) -> None:
+        return None
+
+    def _build_local_index(self, dtype: str) -> LocalVectorIndex:
+        return self.fixture.index
+
+    def load_snapshot(self, path: Optional[str] = None, refresh: bool = False) -> None:
+        self.snapshot = self.fixture.snapshot
+        self.clear_caches()
+
+
+class FixtureNavigator(Navigator, FixtureGraph):
+    """Navigator over a fixture (Navigator.__init__ reaches FixtureGraph.__init__)."""
+
+    def __init__(self, fixture_path: str = FIXTURE_PATH, **navigator_kwargs):
+        navigator_kwargs.setdefault("warm_start", False)
+        super().__init__(None, fixture_path=fixture_path, **navigator_kwargs)
@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.agents.base_agent import BaseAgent
+from src.agents.Code2Text.code2text import Code2Text
+from src.agents.Text2Code.classifiers.agentic_rag import AgenticRAGClassifier
+from src.agents.Text2Code.classifiers.navigator_classifier import NavigatorAgenticClassifier
+from src.agents.Text2Code.text2code import Text2Code
+from src.benchmark.fixture_graph import (
+    FIXTURE_PATH,
+    SCRIPTS_PATH,
+    FixtureGraph,
+    FixtureNavigator,
+    load_fixture,
+    load_scripts,
+)
+from src.benchmark.scripted_model import ScriptedModel
+from src.utils.logging import configure_logging
+from src.utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("text2code", "code2text", "navigator", "agentic_rag")
+# Kept out of the repository (.cache/ is gitignored), unless a path is given
+HISTORY_PATH = os.environ.get(
+    "BENCHMARK_HISTORY_PATH", os.path.join(".cache", "benchmark", "history.jsonl")
+)
+
+# Counters reported per request for each target
+COUNTERS = ("llm_turns", "input_tokens", "output_tokens", "neo4j_queries")
+
+
+def install_scripted_models(obj: Any, scripts: Dict[str, list], latency_ms: float) -> None:
+    """Replace the model of every agent reachable from `obj` by its scripted stand-in."""
+    if isinstance(obj, BaseAgent):
+        name = obj.get_agent_name()
+        if name in scripts:
+            obj.agent.model = ScriptedModel(scripts[name], latency_ms)
+        else:
+            # e.g. a classifier that only delegates to its own agents
+            logger.warning(f"No recorded script for agent '{name}', its model is left as is")
+    for value in vars(obj).values():
+        if isinstance(value, (BaseAgent, Text2Code, Code2Text)):
+            install_scripted_models(value, scripts, latency_ms)
+
+
+def build_target(
+    name: str, scripts: Dict[str, list], latency_ms: float, fixture_path: str
+) -> Callable[[str], Awaitable[Any]]:
+    if name == "text2code":
+        target = Text2Code(NavigatorAgenticClassifier(FixtureNavigator(fixture_path)))
+    elif name == "code2text":
+        target = Code2Text(FixtureGraph(fixture_path=fixture_path))
+    elif name == "navigator":
+        target = NavigatorAgenticClassifier(FixtureNavigator(fixture_path))
+    elif name == "agentic_rag":
+        target = AgenticRAGClassifier(FixtureGraph(fixture_path=fixture_path), top_k=3)
+    else:
+        raise ValueError(f"Unknown target {name}, expected one of {TARGETS}")
+    install_scripted_models(target, scripts, latency_ms)
+    return target
+
+
+async def run_level(
+    call: Callable[[str], Awaitable[Any]], inputs: Sequence[str], concurrency: int, requests: int
+) -> Dict[str, Any]:
+    """Send `requests` calls with at most `concurrency` in flight; latency quantiles in ms."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(inputs[i % len(inputs)])
+            except Exception:
+                errors += 1
+                logger.exception(f"Request {i} failed")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    seconds = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "throughput": round(requests / seconds, 2),
+        "mean_ms": round(float(np.mean(latencies)) * 1000, 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+def _counter_totals() -> Dict[str, float]:
+    totals = {name: 0.0 for name in COUNTERS}
+    for counter in get_metrics().to_dict()["counters"]:
+        if counter["name"] in totals:
+            totals[counter["name"]] += counter["value"]
+    return totals
+
+
+async def run_benchmark(
+    targets: Sequence[str] = TARGETS,
+    concurrency_levels: Sequence[int] = (1, 4, 16),
+    requests: int = 64,
+    latency_ms: float = 0.0,
+    fixture_path: str = FIXTURE_PATH,
+    scripts_path: str = SCRIPTS_PATH,
+) -> Dict[str, List[Dict[str, Any]]]:
+    fixture = load_fixture(fixture_path)
+    scripts = load_scripts(scripts_path)
+    results = {}
+    for name in targets:
+        call = build_target(name, scripts, latency_ms, fixture_path)
+        inputs = fixture.final_codes if name == "code2text" else fixture.activities
+        # One warm-up call, outside of the measures
+        await call(inputs[0])
+
+        results[name] = []
+        for concurrency in concurrency_levels:
+            get_metrics().reset()
+            level = await run_level(call, inputs, concurrency, requests)
+            level.update(
+                {f"{key}_per_request": value / requests for key, value in _counter_totals().items()}
+            )
+            results[name].append(level)
+            logger.info(f"{name} @ {concurrency}: {level}")
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def append_history(results: Dict[str, Any], path: str, **metadata) -> None:
+    """Append one benchmark run (one JSON line) to the history file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        **metadata,
+        "results": results,
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    logger.info(f"Benchmark results appended to {path}")
+
+
+def print_results(results: Dict[str, List[Dict[str, Any]]]) -> None:
+    print("\n" + "=" * 96)
+    print(
+        f"{'target':<12} {'conc.':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'errors':>6} {'turns/req':>9} {'tokens/req':>10}"
+    )
+    print("=" * 96)
+    for name, levels in results.items():
+        for level in levels:
+            tokens = level["input_tokens_per_request"] + level["output_tokens_per_request"]
+            print(
+                f"{name:<12} {level['concurrency']:>5} {level['throughput']:>9.1f} "
+                f"{level['p50_ms']:>9.2f} {level['p95_ms']:>9.2f} {level['p99_ms']:>9.2f} "
+                f"{level['errors']:>6} {level['llm_turns_per_request']:>9.2f} {tokens:>10.0f}"
+            )
+    print("=" * 96)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Offline benchmark: scripted LLM, fixture graph, no network"
+    )
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=64, help="Requests per level")
+    parser.add_argument(
+        "--llm-latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated generation time of each LLM turn (default: 0, framework only)",
+    )
+    parser.add_argument("--fixture", default=FIXTURE_PATH, help="Nomenclature fixture (JSON)")
+    parser.add_argument("--scripts", default=SCRIPTS_PATH, help="Recorded agent runs (JSON)")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSONL file results are added to")
+    parser.add_argument("--label", default=None, help="Free label stored with the results")
+    parser.add_argument("--no-history", action="store_true", help="Do not record the results")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    results = await run_benchmark(
+        args.targets,
+        args.concurrency,
+        args.requests,
+        args.llm_latency_ms,
+        args.fixture,
+        args.scripts,
+    )
+    print_results(results)
+    if not args.no_history:
+        append_history(
+            results,
+            args.history,
+            label=args.label,
+            requests=args.requests,
+            llm_latency_ms=args.llm_latency_ms,
+        )
+
+
+if __name__ == "__main__":
+    configure_logging()
+    logging.getLogger("src").setLevel(logging.WARNING)
+    asyncio.run(main())
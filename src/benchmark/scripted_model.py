@@ -0,0 +1,145 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List
+
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.usage import Usage
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+
+def _item_type(item: Any) -> str:
+    return item.get("type") if isinstance(item, dict) else getattr(item, "type", None)
+
+
+class ScriptedModel(Model):
+    """
+    Local stand-in for the OpenAI-compatible endpoint, replaying a recorded run.
+
+    The script is a list of turns, each either {"tool_calls": [{"name", "arguments"}]} or
+    {"final_output": {...}} (the structured output of the agent). The turn to replay is
+    found from the tool calls already in the conversation, so one instance can serve
+    concurrent runs. `latency_ms` simulates the generation time of each turn; token
+    usage is estimated at 4 characters per token.
+    """
+
+    def __init__(self, script: List[Dict[str, Any]], latency_ms: float = 0.0):
+        self.script = script
+        self.latency_ms = latency_ms
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+        conversation_id=None,
+        prompt=None,
+    ) -> ModelResponse:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return self._respond(system_instructions, input)
+
+    async def stream_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+        conversation_id=None,
+        prompt=None,
+    ) -> AsyncIterator[ResponseCompletedEvent]:
+        """The scripted turn, replayed as a single response.completed event."""
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        response = self._respond(system_instructions, input)
+        yield ResponseCompletedEvent(
+            type="response.completed",
+            sequence_number=0,
+            response=Response(
+                id=f"resp_{uuid.uuid4().hex}",
+                created_at=time.time(),
+                model="benchmark-scripted",
+                object="response",
+                output=response.output,
+                parallel_tool_calls=True,
+                tool_choice="auto",
+                tools=[],
+                usage=ResponseUsage(
+                    input_tokens=response.usage.input_tokens,
+                    output_tokens=response.usage.output_tokens,
+                    total_tokens=response.usage.total_tokens,
+                    input_tokens_details=InputTokensDetails(cached_tokens=0),
+                    output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+                ),
+            ),
+        )
+
+    def _respond(self, system_instructions, input) -> ModelResponse:
+        """Output of the scripted turn, with its estimated token usage."""
+        step = self.script[self._turn(input)]
+        if "tool_calls" in step:
+            output = [
+                ResponseFunctionToolCall(
+                    id=f"fc_{uuid.uuid4().hex}",
+                    call_id=f"call_{uuid.uuid4().hex}",
+                    type="function_call",
+                    name=call["name"],
+                    arguments=json.dumps(call.get("arguments", {}), ensure_ascii=False),
+                )
+                for call in step["tool_calls"]
+            ]
+            text = "".join(call.arguments for call in output)
+        else:
+            text = json.dumps(step["final_output"], ensure_ascii=False)
+            output = [
+                ResponseOutputMessage(
+                    id=f"msg_{uuid.uuid4().hex}",
+                    type="message",
+                    role="assistant",
+                    status="completed",
+                    content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+                )
+            ]
+
+        prompt_chars = len(system_instructions or "") + len(
+            input if isinstance(input, str) else json.dumps(input, default=str)
+        )
+        usage = Usage(
+            requests=1,
+            input_tokens=prompt_chars // 4,
+            output_tokens=len(text) // 4,
+            total_tokens=(prompt_chars + len(text)) // 4,
+        )
+        return ModelResponse(output=output, usage=usage, response_id=None)
+
+    def _turn(self, input) -> int:
+        """Index of the next turn: turns whose tool calls are already in the conversation."""
+        if isinstance(input, str):
+            return 0
+        calls = sum(1 for item in input if _item_type(item) == "function_call")
+        turn = 0
+        while turn < len(self.script) - 1 and calls > 0:
+            calls -= len(self.script[turn].get("tool_calls", []))
+            turn += 1
+        return turn
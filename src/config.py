@@ -9,5 +9,11 @@ load_dotenv(override=True)
 NEO4J_URL = os.environ["NEO4J_URL"]
 NEO4J_USERNAME = os.environ["NEO4J_USERNAME"]
 NEO4J_PWD = os.environ["NEO4J_PWD"]
+NEO4J_MAX_POOL_SIZE = int(os.environ.get("NEO4J_MAX_POOL_SIZE", 50))
 
-neo4j_config = Neo4JConfig(url=NEO4J_URL, username=NEO4J_USERNAME, password=NEO4J_PWD)
+neo4j_config = Neo4JConfig(
+    url=NEO4J_URL,
+    username=NEO4J_USERNAME,
+    password=NEO4J_PWD,
+    max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+)
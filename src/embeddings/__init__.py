@@ -0,0 +1,5 @@
+from .batching import BatchingEmbeddings as BatchingEmbeddings
+from .cache import CachedEmbeddings as CachedEmbeddings
+from .cache import EmbeddingCache as EmbeddingCache
+from .cache import get_embedding_cache as get_embedding_cache
+from .parallel import ParallelEmbeddings as ParallelEmbeddings
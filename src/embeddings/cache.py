@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.utils.metrics import count
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite")
+DEFAULT_MEMORY_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MEMORY_ENTRIES", 20000))
+
+
+def normalize_text(text: str) -> str:
+    """NFKC and whitespace normalisation, so that trivially different labels share a key."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def cache_key(model: str, text: str, normalize: bool = True) -> str:
+    """Key of (model, text); `normalize=False` keys on the exact text sent to the model."""
+    if normalize:
+        text = normalize_text(text)
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by (model name, normalized text), or by the exact text with
+    `normalize=False`.
+
+    An in-memory LRU sits in front of an optional SQLite store (vectors kept as float32
+    blobs), so that repeated queries and reruns of a dataset never hit the embedding API.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        normalize: bool = True,
+    ):
+        self.path = path
+        self.normalize = normalize
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        keys = [cache_key(model, text, self.normalize) for text in texts]
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+            missing = [key for key in set(keys) if key not in found]
+            if missing and self._db is not None:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", missing
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+
+            vectors = [found.get(key) for key in keys]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def set_many(self, model: str, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        keys = [cache_key(model, text, self.normalize) for text in texts]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, list(vector))
+            if self._db is not None:
+                # One transaction for the whole batch
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                    [
+                        (key, model, np.asarray(vector, dtype=np.float32).tobytes())
+                        for key, vector in zip(keys, vectors)
+                    ],
+                )
+                self._db.commit()
+
+
+def _count_lookups(vectors: Sequence[Optional[List[float]]]) -> None:
+    hits = sum(vector is not None for vector in vectors)
+    count("embedding_cache_hits", hits)
+    count("embedding_cache_misses", len(vectors) - hits)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only calls the underlying model for texts not in the cache."""
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(self.model, texts)
+        _count_lookups(vectors)
+        missing = list(dict.fromkeys(texts[i] for i, v in enumerate(vectors) if v is None))
+        if missing:
+            computed = dict(zip(missing, self.embeddings.embed_documents(missing)))
+            self.cache.set_many(self.model, list(computed), list(computed.values()))
+            vectors = [v if v is not None else computed[text] for text, v in zip(texts, vectors)]
+        return vectors
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # The store is read and written in a thread, not to block the event loop
+        vectors = await asyncio.to_thread(self.cache.get_many, self.model, texts)
+        _count_lookups(vectors)
+        missing = list(dict.fromkeys(texts[i] for i, v in enumerate(vectors) if v is None))
+        if missing:
+            computed = dict(zip(missing, await self.embeddings.aembed_documents(missing)))
+            await asyncio.to_thread(
+                self.cache.set_many, self.model, list(computed), list(computed.values())
+            )
+            vectors = [v if v is not None else computed[text] for text, v in zip(texts, vectors)]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get_many(self.model, [text])[0]
+        _count_lookups([vector])
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.set_many(self.model, [text], [vector])
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = (await asyncio.to_thread(self.cache.get_many, self.model, [text]))[0]
+        _count_lookups([vector])
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            await asyncio.to_thread(self.cache.set_many, self.model, [text], [vector])
+        return vector
+
+
+_embedding_caches = {}
+_embedding_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(path: Optional[str] = DEFAULT_CACHE_PATH) -> EmbeddingCache:
+    """Process-wide cache per store path (None for memory only)."""
+    with _embedding_caches_lock:
+        if path not in _embedding_caches:
+            _embedding_caches[path] = EmbeddingCache(path)
+        return _embedding_caches[path]
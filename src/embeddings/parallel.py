@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import random
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class ParallelEmbeddings(Embeddings):
+    """
+    Embed large document lists in fixed-size batches, with bounded concurrent requests.
+
+    Each batch is retried with exponential backoff (and jitter) before failing the whole
+    call. Meant for bulk jobs such as the graph build; queries are passed through.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = 64,
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+    ):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return asyncio.run(self.aembed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = [texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if not batches:
+            return []
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        done = 0
+        log_every = max(1, len(batches) // 10)
+
+        async def run(batch: List[str]) -> List[List[float]]:
+            nonlocal done
+            async with semaphore:
+                vectors = await self._embed_batch(batch)
+            done += 1
+            if done % log_every == 0 or done == len(batches):
+                logger.info(f"🧮 Embedded {done}/{len(batches)} batches")
+            return vectors
+
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [vector for vectors in results for vector in vectors]
+
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.embeddings.aembed_documents(batch)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * 2**attempt * (1 + random.random())
+                logger.warning(
+                    f"Embedding batch failed ({e}), retry {attempt + 1}/{self.max_retries} "
+                    f"in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
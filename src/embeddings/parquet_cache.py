@@ -0,0 +1,128 @@
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from .cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class ParquetEmbeddingCache:
+    """
+    Content-addressed embedding store kept in a single Parquet file, keyed by the model and
+    the exact text sent to it (no normalisation: texts differing only in whitespace are
+    embedded separately).
+
+    Same interface as EmbeddingCache (so it plugs into CachedEmbeddings), but meant for
+    bulk use by the graph builder: the whole file is memory-mapped once, and new vectors are
+    written back in one atomic rewrite. Vectors are stored as float32 lists of any size, so
+    that models of different dimensions can share the file; every model is checked to have
+    a single dimension on load.
+    """
+
+    def __init__(self, path: str):
+        if pa is None:
+            raise ImportError("pyarrow is required for the Parquet embedding cache")
+        self.path = path
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._models: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(path):
+            self._load(pq.read_table(path, memory_map=True))
+            logger.info(f"📦 Loaded {len(self._vectors)} cached embeddings from {path}")
+
+    def _load(self, table: "pa.Table") -> None:
+        if not table.num_rows:
+            return
+        column = table.column("vector").combine_chunks()
+        if pa.types.is_fixed_size_list(column.type):
+            # Files written before vectors were stored as variable-size lists
+            column = column.cast(pa.list_(column.type.value_type))
+        values = column.flatten().to_numpy()
+        offsets = column.offsets.to_numpy()
+        keys = table.column("key").to_pylist()
+        models = table.column("model").to_pylist()
+
+        dims: Dict[str, Set[int]] = {}
+        for model, start, end in zip(models, offsets[:-1], offsets[1:]):
+            dims.setdefault(model, set()).add(int(end - start))
+        invalid = {model for model, sizes in dims.items() if len(sizes) > 1}
+        for model in invalid:
+            logger.warning(
+                f"Cached embeddings of model '{model}' have several dimensions "
+                f"{sorted(dims[model])}, they are ignored"
+            )
+
+        for i, (key, model) in enumerate(zip(keys, models)):
+            if model not in invalid:
+                self._vectors[key] = values[offsets[i] : offsets[i + 1]]
+                self._models[key] = model
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        with self._lock:
+            vectors = [self._vectors.get(cache_key(model, text, normalize=False)) for text in texts]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return [vector.tolist() if vector is not None else None for vector in vectors]
+
+    def set_many(self, model: str, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        with self._lock:
+            dims = {len(vector) for vector in vectors}
+            stale = [
+                key
+                for key, name in self._models.items()
+                if name == model and len(self._vectors[key]) not in dims
+            ]
+            if stale:
+                # Same model name, new dimension: the model changed, its old vectors are stale
+                logger.warning(
+                    f"Dimension of model '{model}' changed to {sorted(dims)}, "
+                    f"dropping {len(stale)} cached embeddings"
+                )
+                for key in stale:
+                    del self._vectors[key], self._models[key]
+            for text, vector in zip(texts, vectors):
+                key = cache_key(model, text, normalize=False)
+                self._vectors[key] = np.asarray(vector, dtype=np.float32)
+                self._models[key] = model
+            self._write()
+
+    def _write(self) -> None:
+        if not self._vectors:
+            return
+        keys = list(self._vectors)
+        vectors = [self._vectors[key] for key in keys]
+        offsets = np.concatenate([[0], np.cumsum([len(vector) for vector in vectors])])
+        vector_column = pa.ListArray.from_arrays(
+            pa.array(offsets, type=pa.int32()),
+            pa.array(np.concatenate(vectors).astype(np.float32, copy=False), type=pa.float32()),
+        )
+        table = pa.table(
+            {
+                "key": pa.array(keys, type=pa.string()),
+                "model": pa.array([self._models[key] for key in keys], type=pa.string()),
+                "vector": vector_column,
+            }
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Write next to the target then rename, so an interrupted build never corrupts it
+        tmp_path = f"{self.path}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, self.path)
+        logger.info(f"💾 Saved {len(keys)} embeddings to {self.path}")
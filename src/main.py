@@ -1,26 +1,36 @@
 import asyncio
 import logging
 import sys
-from langfuse import get_client, propagate_attributes, observe
+import time
 from datetime import datetime
+from functools import lru_cache
+
+from langfuse import get_client, observe, propagate_attributes
 
 from src.agents.Text2Code.classifiers.navigator_classifier import NavigatorAgenticClassifier
 from src.config import neo4j_config
 from src.navigator.navigator import Navigator
+from src.neo4j_graph.cache import get_graph_cache
 from src.utils.logging import configure_logging
+from src.utils.metrics import get_metrics
 from src.utils.parser import parse_args
 
 configure_logging()
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def get_navigator_classifier() -> NavigatorAgenticClassifier:
+    """Navigator and agent are built once and shared by all queries."""
+    return NavigatorAgenticClassifier(Navigator(neo4j_config))
+
+
 @observe
 async def classify_navigator(query: str, experiment_name: str):
     """Classify using agentic method"""
     logger.info(f"Navigator classification: {query}")
     # TODO: add the management for exp_name
-    navigator = Navigator(neo4j_config)
-    classifier = NavigatorAgenticClassifier(navigator)
+    classifier = get_navigator_classifier()
     result = await classifier(query)
     logger.info(f"Le résultat de la classification est : {result}")
     return result
@@ -35,21 +45,52 @@ async def classify_agentic_rag(query: str, experiment_name: str):
 
 
 @observe
-async def process_batch_file(filepath: str, method_func, experiment_name: str):
-    """Process a batch file with queries"""
+async def process_batch_file(
+    filepath: str, method_func, experiment_name: str, concurrency: int = 1
+):
+    """
+    Process a batch file with queries.
+
+    Up to `concurrency` queries are classified at the same time. Results keep the order
+    of the file, and a failing query is reported with its error instead of stopping the batch.
+    """
     logger.info(f"Processing batch file: {filepath}")
 
     with open(filepath, "r", encoding="utf-8") as f:
         queries = [line.strip() for line in f if line.strip()]
 
-    logger.info(f"Found {len(queries)} queries to process")
-
-    results = []
-    for i, query in enumerate(queries, 1):
-        logger.info(f"Processing {i}/{len(queries)}: {query}")
-        result = await method_func(query, experiment_name)
-        results.append({"query": query, "code": result})
-
+    logger.info(f"Found {len(queries)} queries to process (concurrency: {concurrency})")
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = [None] * len(queries)
+    progress = {"done": 0, "failed": 0}
+    start = time.perf_counter()
+
+    async def process_query(i: int, query: str):
+        async with semaphore:
+            try:
+                result = await method_func(query, experiment_name)
+                results[i] = {"query": query, "code": result}
+            except Exception as e:
+                logger.exception(f"Query {i + 1} failed: {query}")
+                results[i] = {"query": query, "code": None, "error": str(e)}
+                progress["failed"] += 1
+
+        progress["done"] += 1
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Processed {progress['done']}/{len(queries)} ({progress['failed']} failed) "
+            f"- {progress['done'] / elapsed:.2f} queries/s"
+        )
+
+    await asyncio.gather(*(process_query(i, query) for i, query in enumerate(queries)))
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Batch done: {len(queries)} queries in {elapsed:.1f}s "
+        f"({len(queries) / elapsed if elapsed else 0:.2f} queries/s), "
+        f"{progress['failed']} failed"
+    )
     return results
 
 
@@ -84,13 +125,27 @@ async def main():
             method_name, _, method_func = methods_to_run[0]
             logger.info(f"Batch mode with method: {method_name}")
 
-            results = await process_batch_file(args.batch_file, method_func, args.experiment_name)
+            results = await process_batch_file(
+                args.batch_file, method_func, args.experiment_name, args.concurrency
+            )
+            cache_stats = get_graph_cache().stats()
+            logger.info(
+                f"Graph cache: {cache_stats.hits} hits, {cache_stats.misses} misses "
+                f"({cache_stats.hit_rate:.1%} hit rate), {cache_stats.evictions} evictions, "
+                f"{cache_stats.entries} entries / {cache_stats.size_bytes} bytes"
+            )
+            if method_name == "navigator":
+                get_navigator_classifier().graph.payload_shaper.report()
+            get_metrics().report()
+            if args.metrics_file:
+                get_metrics().export(args.metrics_file)
 
             print("\n" + "=" * 80)
             print("BATCH RESULTS")
             print("=" * 80)
             for result in results:
-                print(f"  {result['query']:40s} → {result['code']}")
+                outcome = result["code"] if "error" not in result else f"ERROR: {result['error']}"
+                print(f"  {result['query']:40s} → {outcome}")
             print("=" * 80)
             return 0
 
@@ -106,6 +161,8 @@ async def main():
 
             print(f"\n✅ Result: {result}")
 
+        if args.metrics_file:
+            get_metrics().export(args.metrics_file)
         return 0
 
     except KeyboardInterrupt:
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from src.neo4j_graph.graph import Graph, _unfreeze_list_of_dicts
+from src.neo4j_graph.hierarchy import ROOT_CODE
+from src.utils.metrics import count
+
+logger = logging.getLogger(__name__)
+
+# Default settings, overridable per instance
+DEFAULT_BEAM_WIDTH = int(os.environ.get("NAVIGATOR_BEAM_WIDTH", 3))
+DEFAULT_BEAM_MARGIN = float(os.environ.get("NAVIGATOR_BEAM_MARGIN", 0.02))
+
+
+class BeamEntry(BaseModel):
+    """A node of the beam, with the path that leads to it from the root."""
+
+    code: str
+    score: float
+    final: bool
+    path: List[str]
+
+
+class BeamResult(BaseModel):
+    """
+    Outcome of an embedding-guided descent.
+
+    `resolved` is True when a single FINAL code was reached with a clear margin at every
+    step: `code` is then the answer. Otherwise `code` is the deepest node shared by all
+    the beam paths, where the LLM takes over, and `candidates` are the nodes it could not
+    separate.
+    """
+
+    activity: str
+    resolved: bool
+    code: str
+    path: List[str]
+    score: Optional[float] = None
+    candidates: List[Tuple[str, float]] = []
+    steps: int = 0
+
+
+class BeamSearch:
+    """
+    Descend the nomenclature by scoring the children of the current nodes against the
+    activity embedding, using the node embeddings stored by the graph builder.
+
+    At each level the children of every node in the beam are scored together. When the
+    best child leads the runner-up by at least `margin`, the beam collapses to it; when the
+    children are too close to call, the `beam_width` best are kept and explored one level
+    further, so that a clear winner further down can still settle the choice. The search
+    is resolved when the beam ends on a single FINAL code.
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        beam_width: int = DEFAULT_BEAM_WIDTH,
+        margin: float = DEFAULT_BEAM_MARGIN,
+        root: str = ROOT_CODE,
+    ):
+        self.graph = graph
+        self.beam_width = beam_width
+        self.margin = margin
+        self.root = root
+
+    async def __call__(self, activity: str) -> BeamResult:
+        embedding = await self.graph.emb_model.aembed_query(f"query : {activity}")
+        beam = [BeamEntry(code=self.root, score=0.0, final=False, path=[self.root])]
+        steps = 0
+
+        while any(not entry.final for entry in beam):
+            steps += 1
+            expansions = await self._expand(embedding, beam)
+            expansions.sort(key=lambda entry: (-entry.score, entry.code))
+
+            if len(expansions) == 1 or expansions[0].score - expansions[1].score >= self.margin:
+                beam = expansions[:1]
+            else:
+                beam = expansions[: self.beam_width]
+            logger.debug(
+                f"Beam step {steps} for '{activity}': "
+                f"{[(entry.code, round(entry.score, 4)) for entry in beam]}"
+            )
+
+        if len(beam) == 1 and beam[0].code != self.root:
+            best = beam[0]
+            result = BeamResult(
+                activity=activity,
+                resolved=True,
+                code=best.code,
+                path=best.path,
+                score=best.score,
+                steps=steps,
+            )
+        else:
+            path = _common_prefix([entry.path for entry in beam])
+            result = BeamResult(
+                activity=activity,
+                resolved=False,
+                code=path[-1],
+                path=path,
+                candidates=[(entry.code, entry.score) for entry in beam],
+                steps=steps,
+            )
+        count("beam_searches", outcome="resolved" if result.resolved else "ambiguous")
+        logger.info(
+            f"Beam search for '{activity}': {'resolved' if result.resolved else 'ambiguous'} "
+            f"at {result.code} after {steps} steps"
+        )
+        return result
+
+    async def _expand(self, embedding: List[float], beam: List[BeamEntry]) -> List[BeamEntry]:
+        """Children of the open beam nodes, scored in one call; FINAL nodes are carried over."""
+        open_entries = [entry for entry in beam if not entry.final]
+        children_by_entry = [
+            _unfreeze_list_of_dicts(children)
+            for children in await asyncio.gather(
+                *(self.graph.arun(self.graph._cached_get_children, e.code) for e in open_entries)
+            )
+        ]
+        codes = [child["code"] for children in children_by_entry for child in children]
+        scores = await self.graph.score_codes(embedding, codes)
+
+        expansions = [entry for entry in beam if entry.final]
+        for entry, children in zip(open_entries, children_by_entry):
+            scored = [child for child in children if child["code"] in scores]
+            if not scored:
+                # Leaf without the FINAL flag (or children without embedding): kept as is
+                expansions.append(entry.model_copy(update={"final": True}))
+            expansions.extend(
+                BeamEntry(
+                    code=child["code"],
+                    score=scores[child["code"]],
+                    final=bool(child.get("final")),
+                    path=entry.path + [child["code"]],
+                )
+                for child in scored
+            )
+        return expansions
+
+
+def _common_prefix(paths: List[List[str]]) -> List[str]:
+    prefix = []
+    for codes in zip(*paths):
+        if any(code != codes[0] for code in codes):
+            break
+        prefix.append(codes[0])
+    return prefix
@@ -1,10 +1,17 @@
+import json
 import logging
-from typing import Any, Dict, List, Optional
-import json 
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel
 
 from agents import function_tool
-from src.neo4j_graph.graph import Graph, Neo4JConfig, _unfreeze_dict, _unfreeze_list_of_dicts
 from src.agents.closers.match_verifier import MatchVerificationInput
+from src.navigator.payload import PayloadShaper
+from src.neo4j_graph.graph import Graph, Neo4JConfig, _unfreeze_dict, _unfreeze_list_of_dicts
+from src.utils.metrics import traced
 
 logger = logging.getLogger(__name__)
 
@@ -14,26 +21,24 @@ def make_tools(navigator):
     # Information methods
     # ------------------------------------------------------------------
 
-    @function_tool
-    def get_current_information() -> Dict[str, Any]:
+    async def get_current_information() -> Dict[str, Any]:
         """
         Retourne les informations du noeud actuel.
-        Fournis les codes et les noms des noeuds enfants.  
+        Fournis les codes et les noms des noeuds enfants.
         Pour avoir l'information détaillée sur un enfant, utilise get_code_information(code)
 
         Returns:
             Informations complètes du noeud courant avec historique de navigation
         """
         logger.info("Navigator: get_current_information called")
-        data = navigator._cached_get_code_information(navigator.current_code)
+        data = await navigator.arun(navigator._cached_get_code_information, navigator.current_code)
         if not data:
             logger.info("No data to sent")
             return {"error": f"Code {navigator.current_code} not found"}
         logger.info(f"Data sent to the llm: {data}")
         return _unfreeze_dict(data)
 
-    @function_tool
-    def get_code_information(code: str) -> Dict[str, Any]:
+    async def get_code_information(code: str) -> Dict[str, Any]:
         """
         Retourne les informations d'un code spécifique sans changer la position.
 
@@ -45,28 +50,50 @@ def make_tools(navigator):
         """
         logger.info("Navigator: get_code_information called")
 
-        data = navigator._cached_get_code_information(code)
+        data = await navigator.arun(navigator._cached_get_code_information, code)
 
         if not data:
             return {"error": f"Code {code} not found"}
 
-        info = _unfreeze_dict(data)
-
         logger.info(f"Information available: {data}")
 
-        filtered_information = {
-            "code": info.get("code"),
-            "name": info.get("name"),
-            "level": info.get("level"),
-            "description": info.get("description", "")[:500],  # Limiter la taille
-        }
+        filtered_information = _filter_information(_unfreeze_dict(data))
 
         logger.info(f"Filtered information: {filtered_information}")
 
         return filtered_information
 
-    @function_tool
-    def get_current_children() -> List[Dict[str, Any]]:
+    async def get_codes_information(codes: List[str]) -> List[Dict[str, Any]]:
+        """
+        Retourne les informations de plusieurs codes en un seul appel, sans changer la position.
+        À préférer à plusieurs appels de get_code_information pour comparer des codes.
+
+        Args:
+            codes: Liste de codes NACE à consulter
+
+        Returns:
+            Informations (code, name, level, description) de chaque code trouvé
+        """
+        logger.info(f"Navigator: get_codes_information called with codes: {codes}")
+        data = await navigator.arun(navigator.get_codes_information, codes)
+        return [_filter_information(info) for info in _unfreeze_list_of_dicts(data)]
+
+    async def expand_current_node() -> Dict[str, Any]:
+        """
+        Retourne en un seul appel le noeud actuel, son parent et ses enfants avec leurs notes
+        explicatives (description, inclusions, exclusions).
+        À utiliser pour choisir l'enfant vers lequel descendre.
+
+        Returns:
+            Noeud courant avec parent, children et siblings_count
+        """
+        logger.info(f"Navigator: expand_current_node called at {navigator.current_code}")
+        data = await navigator.arun(navigator._cached_expand_node, navigator.current_code)
+        if not data:
+            return {"error": f"Code {navigator.current_code} not found"}
+        return _unfreeze_dict(data)
+
+    async def get_current_children() -> List[Dict[str, Any]]:
         """
         Retourne les codes et les noms des enfants directs du noeud actuel.
         Pour avoir l'information détaillée sur un enfant, utilise get_code_information(code)
@@ -74,19 +101,18 @@ def make_tools(navigator):
         Returns:
             Liste des codes enfants du noeud courant, contient le code et son nom
         """
-        logger.info(f"Navigator: get_current_children called at the position {navigator.current_code}")
-        children_found = _unfreeze_list_of_dicts(navigator._cached_get_children(navigator.current_code))
+        logger.info(
+            f"Navigator: get_current_children called at the position {navigator.current_code}"
+        )
+        children_found = _unfreeze_list_of_dicts(
+            await navigator.arun(navigator._cached_get_children, navigator.current_code)
+        )
         keys_to_keep = ["code", "name"]
-        print(f"Keys_to_keep: {keys_to_keep}")
-        filtered_children_found = [
-            {k:d[k] for k in keys_to_keep}
-            for d in children_found
-        ]
+        filtered_children_found = [{k: d[k] for k in keys_to_keep} for d in children_found]
         logger.info(f"Navigator children found: {filtered_children_found}")
         return filtered_children_found
 
-    @function_tool
-    def get_current_siblings() -> List[Dict[str, Any]]:
+    async def get_current_siblings() -> List[Dict[str, Any]]:
         """
         Retourne les codes au même niveau que le noeud actuel.
 
@@ -94,10 +120,11 @@ def make_tools(navigator):
             Liste des siblings du noeud courant
         """
         logger.info("Navigator: get_current_siblings called")
-        return _unfreeze_list_of_dicts(navigator._cached_get_siblings(navigator.current_code))
+        return _unfreeze_list_of_dicts(
+            await navigator.arun(navigator._cached_get_siblings, navigator.current_code)
+        )
 
-    @function_tool
-    def get_current_descendants(levels: int = 2) -> List[Dict[str, Any]]:
+    async def get_current_descendants(levels: int = 2) -> List[Dict[str, Any]]:
         """
         Retourne les descendants du noeud actuel jusqu'à N niveaux.
 
@@ -109,11 +136,26 @@ def make_tools(navigator):
         """
         logger.info("Navigator: get_current_descendants called")
         return _unfreeze_list_of_dicts(
-            navigator._cached_get_descendants(navigator.current_code, levels)
+            await navigator.arun(navigator._cached_get_descendants, navigator.current_code, levels)
         )
 
-    @function_tool
-    def get_current_parent() -> Optional[Dict[str, Any]]:
+    async def search_in_current_subtree(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Recherche les codes finaux les plus proches d'une description, uniquement parmi les
+        descendants du noeud actuel.
+
+        Args:
+            query: Description de l'activité
+            top_k: Nombre de codes à retourner (défaut: 5)
+
+        Returns:
+            Liste des codes finaux (code, score) du plus proche au moins proche
+        """
+        logger.info("Navigator: search_in_current_subtree called")
+        results = await navigator.search_vector_codes(query, top_k, under=navigator.current_code)
+        return [{"code": code, "score": round(score, 4)} for code, score in results]
+
+    async def get_current_parent() -> Optional[Dict[str, Any]]:
         """
         Retourne le parent direct du noeud actuel.
 
@@ -121,15 +163,14 @@ def make_tools(navigator):
             Dictionnaire du parent ou None si pas de parent
         """
         logger.info("Navigator: get_current_parent called")
-        data = navigator._cached_get_parent(navigator.current_code)
+        data = await navigator.arun(navigator._cached_get_parent, navigator.current_code)
         return _unfreeze_dict(data) if data else None
 
     # ------------------------------------------------------------------
     # Navigation methods
     # ------------------------------------------------------------------
 
-    @function_tool
-    def navigate_to(code: str) -> Dict[str, Any]:
+    async def navigate_to(code: str) -> Dict[str, Any]:
         """
         Se déplace vers un code spécifique.
 
@@ -140,7 +181,7 @@ def make_tools(navigator):
             Résultat de la navigation avec informations du nouveau noeud
         """
         logger.info(f"Navigator: navigate_to called with node: {code}")
-        info = get_code_information(code)
+        info = await get_code_information(code)
 
         if "error" in info:
             return {
@@ -149,19 +190,19 @@ def make_tools(navigator):
                 "current_position": navigator.current_code,
             }
 
-        navigator.current_code = code
-        navigator.history.append(code)
+        session = navigator.session
+        session.current_code = code
+        session.history.append(code)
         logger.info(f"Navigated to: {code}")
 
         return {
             "success": True,
             "node": info,
-            "current_position": navigator.current_code,
-            "navigation_depth": len(navigator.history),
+            "current_position": session.current_code,
+            "navigation_depth": len(session.history),
         }
 
-    @function_tool
-    def go_to_parent() -> Dict[str, Any]:
+    async def go_to_parent() -> Dict[str, Any]:
         """
         Remonte au parent du noeud actuel.
 
@@ -170,7 +211,7 @@ def make_tools(navigator):
         """
         logger.info("Navigator: go_to_parent called")
 
-        parent_info = get_current_parent()
+        parent_info = await get_current_parent()
 
         if parent_info is None:
             return {
@@ -180,19 +221,19 @@ def make_tools(navigator):
             }
 
         parent_code = parent_info["code"]
-        navigator.current_code = parent_code
-        navigator.history.append(parent_code)
+        session = navigator.session
+        session.current_code = parent_code
+        session.history.append(parent_code)
         logger.info(f"Move up to: {parent_code}")
 
         return {
             "success": True,
             "parent": parent_info,
-            "current_position": navigator.current_code,
-            "navigation_depth": len(navigator.history),
+            "current_position": session.current_code,
+            "navigation_depth": len(session.history),
         }
 
-    @function_tool
-    def go_to_child(child_code: str) -> Dict[str, Any]:
+    async def go_to_child(child_code: str) -> Dict[str, Any]:
         """
         Descend vers un enfant spécifique du noeud actuel.
 
@@ -204,58 +245,64 @@ def make_tools(navigator):
         """
         logger.info(f"Navigator: go_to_child called with child_code: {child_code}")
 
-        children = _unfreeze_list_of_dicts(navigator._cached_get_children(navigator.current_code))
+        session = navigator.session
+        children = _unfreeze_list_of_dicts(
+            await navigator.arun(navigator._cached_get_children, session.current_code)
+        )
         child_codes = [child["code"] for child in children]
 
         if child_code not in child_codes:
             logger.warning(f"child_code {child_code} is not in child_codes")
             return {
                 "success": False,
-                "error": f"{child_code} is not a direct child of {navigator.current_code}",
-                "current_position": navigator.current_code,
+                "error": f"{child_code} is not a direct child of {session.current_code}",
+                "current_position": session.current_code,
                 "available_children": child_codes,
             }
 
         target_info = next((c for c in children if c["code"] == child_code), None)
-        navigator.current_code = child_code
-        navigator.history.append(child_code)
+        session.current_code = child_code
+        session.history.append(child_code)
         logger.info(f"Move down to: {child_code}")
-        logger.info(f"Navigator.current_code is {navigator.current_code} and navigator.history is {navigator.history}")
+        logger.info(
+            f"Navigator.current_code is {session.current_code} "
+            f"and navigator.history is {session.history}"
+        )
 
         return {
             "success": True,
             "node": target_info,
-            "current_position": navigator.current_code,
-            "navigation_depth": len(navigator.history),
+            "current_position": session.current_code,
+            "navigation_depth": len(session.history),
         }
 
-    @function_tool
     def reset_to_root() -> Dict[str, Any]:
         """
         Réinitialise la navigation à la racine.
+        À utiliser si le point de départ de la navigation ne correspond pas à l'activité.
 
         Returns:
             Confirmation de la réinitialisation
         """
         logger.info("Navigator: reset_to_root called")
 
-        root = navigator.history[0]
-        navigator.current_code = root
-        navigator.history = [root]
+        session = navigator.session
+        root = navigator.root
+        session.current_code = root
+        session.history = [root]
         logger.info("Reset to root")
 
         return {
             "success": True,
             "message": "Navigation reset to root",
-            "current_position": navigator.current_code,
+            "current_position": session.current_code,
         }
 
     # ------------------------------------------------------------------
     # Context methods
     # ------------------------------------------------------------------
 
-    @function_tool
-    def get_context_summary() -> Dict[str, Any]:
+    async def get_context_summary() -> Dict[str, Any]:
         """
         Retourne un résumé complet de la position actuelle dans la hiérarchie.
 
@@ -264,14 +311,14 @@ def make_tools(navigator):
         """
         logger.info("Navigator: get_context_summary called")
 
-        current = get_current_information()
+        # One lookup for the node, its parent and its children
+        current = await expand_current_node()
         if "error" in current:
             return current
-        children = get_current_children()
-        siblings = get_current_siblings()
-        parent = get_current_parent()
 
-        description = current.get("description", "")
+        parent = current["parent"]
+        children = current["children"]
+        description = current.get("description") or ""
         truncated_desc = description[:200] + "..." if len(description) > 200 else description
 
         result = {
@@ -283,14 +330,13 @@ def make_tools(navigator):
             },
             "parent_code": parent.get("code") if parent else None,
             "children_count": len(children),
-            "siblings_count": len(siblings),
+            "siblings_count": current["siblings_count"],
             "navigation_path": " → ".join(navigator.history[-5:]),
             "can_go_deeper": len(children) > 0,
         }
-        logger.info("Navigator result for get_context_summary: {result}")
+        logger.info(f"Navigator result for get_context_summary: {result}")
         return result
 
-    @function_tool
     def get_navigation_history() -> Dict[str, Any]:
         """
         Retourne l'historique complet de navigation.
@@ -307,11 +353,10 @@ def make_tools(navigator):
             "navigation_depth": len(navigator.history),
         }
 
-    @function_tool
     def submit_classification(
         query: str,
         confidence: str,
-        reasoning: str, 
+        reasoning: str,
         # TODO: rajouter "alternatives: str"
     ) -> MatchVerificationInput:
         """
@@ -319,11 +364,11 @@ def make_tools(navigator):
         🎯 OUTIL DE SORTIE FINALE - Cette fonction retourne directement le résultat final attendu.
         🚨 TU DOIS UTILISER CET OUTIL - Ne renvoie JAMAIS de texte libre pour la classification finale.
         🚨 Appelle cette fonction avec les 3 paramètres - PAS de texte avant ou après l'appel.
-        
+
         Args:
             query: Le libellé EXACT de l'activité (copie-colle du libellé initial)
                 Exemple : "Fabrication de statuettes en bois dur"
-            
+
             confidence: Un nombre décimal entre 0.0 et 1.0 (format : "0.95", "0.78", "0.60")
                     ⚠️ UNIQUEMENT le nombre, pas de texte comme "très élevée" ou "forte"
                     Guide :
@@ -331,14 +376,14 @@ def make_tools(navigator):
                     - "0.75" à "0.95" : bonne correspondance
                     - "0.50" à "0.75" : correspondance acceptable
                     - < "0.50" : incertitude élevée
-            
+
             reasoning: Ta justification complète en texte libre (ici tu peux écrire ce que tu veux)
                     Structure suggérée :
                     - Pourquoi ce code correspond
                     - Chemin de navigation (division → groupe → classe)
                     - Alternatives écartées
                     - Éléments clés de la définition NACE
-        
+
         Returns:
             Dictionnaire avec activity, code, proposed_explanation, proposed_confidence
         """
@@ -362,16 +407,25 @@ def make_tools(navigator):
 
     logger.info("Navigator tools created")
 
+    # Tools are wrapped at the end so that they can call each other as plain functions;
+    # their outputs are kept within the token budget of each tool
     return [
-        get_current_information,
-        get_code_information,
-        get_current_parent,
-        get_current_children,
-        get_current_siblings,
-        go_to_parent,
-        go_to_child,
-        get_context_summary,
-        # submit_classification
+        function_tool(traced("tool")(navigator.payload_shaper.wrap(tool)))
+        for tool in [
+            get_current_information,
+            get_code_information,
+            get_codes_information,
+            expand_current_node,
+            get_current_parent,
+            get_current_children,
+            get_current_siblings,
+            search_in_current_subtree,
+            go_to_parent,
+            go_to_child,
+            reset_to_root,
+            get_context_summary,
+            # submit_classification
+        ]
     ]
 
     """ return [
@@ -391,16 +445,130 @@ def make_tools(navigator):
     ] """
 
 
+def _filter_information(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a code shown to the agent (the description is bounded by the PayloadShaper)."""
+    return {
+        "code": info.get("code"),
+        "name": info.get("name"),
+        "level": info.get("level"),
+        "description": info.get("description"),
+    }
+
+
+class NavigationSession(BaseModel):
+    """Position and history of one navigation run."""
+
+    current_code: str
+    history: List[str]
+
+
+# Session of the run being executed in the current asyncio task (or thread)
+_current_session: ContextVar[Optional[NavigationSession]] = ContextVar(
+    "navigation_session", default=None
+)
+
+
 class Navigator(Graph):
     """
-    Classe de navigation dans la hiérarchie NACE avec état persistant.
-    Utilise Graph pour les requêtes et maintient la position courante.
+    Classe de navigation dans la hiérarchie NACE.
+    Utilise Graph pour les requêtes ; la position courante est portée par une
+    NavigationSession propre à chaque exécution, si bien qu'un même Navigator
+    (et un même Agent) peut servir plusieurs classifications concurrentes.
     """
 
-    def __init__(self, neo4j_config: Neo4JConfig, root: str = "root"):
-        super().__init__(neo4j_config)
-        self.current_code = root
-        self.history = [root]
+    def __init__(
+        self,
+        neo4j_config: Neo4JConfig,
+        root: str = "root",
+        warm_start: Optional[bool] = None,
+        warm_start_levels: Sequence[int] = (3, 2),
+        warm_start_margin: float = 0.02,
+        payload_shaper: Optional[PayloadShaper] = None,
+        **graph_kwargs,
+    ):
+        super().__init__(neo4j_config, **graph_kwargs)
+        self.root = root
+        # Token budgets of the tool outputs, and tokens emitted per tool
+        self.payload_shaper = payload_shaper or PayloadShaper()
+        # Warm start: runs begin at a division or group pre-selected by embedding retrieval
+        if warm_start is None:
+            warm_start = os.environ.get("NAVIGATOR_WARM_START", "false").lower() == "true"
+        self.warm_start = warm_start
+        self.warm_start_levels = tuple(warm_start_levels)
+        self.warm_start_margin = warm_start_margin
+        # Used when tools are called outside of start_session (single run scripts)
+        self._default_session = self.new_session()
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+
+    def new_session(
+        self, start: Optional[str] = None, path: Optional[List[str]] = None
+    ) -> NavigationSession:
+        """Session positioned on `start`, or at the end of `path` (root first) if given."""
+        history = list(path) if path else [start or self.root]
+        return NavigationSession(current_code=history[-1], history=history)
+
+    @traced("navigator")
+    async def warm_start_path(self, activity: str) -> List[str]:
+        """
+        Path (root first) to the node where the navigation of `activity` should start.
+
+        The closest codes of each warm start level (deepest first, e.g. groups, then
+        divisions) are retrieved from the stored node embeddings; the first level whose
+        best code leads the runner-up by at least warm_start_margin is used. When no level
+        is confident enough, the navigation starts at the root. The agent keeps
+        go_to_parent and reset_to_root to climb back if the pre-routing was wrong.
+        """
+        for level in self.warm_start_levels:
+            closest = await self.search_vector_codes(activity, 2, level=level)
+            if not closest:
+                continue
+            if len(closest) > 1 and closest[0][1] - closest[1][1] < self.warm_start_margin:
+                continue
+            code = closest[0][0]
+            ancestors = await self.arun(self._cached_get_ancestors, code)
+            logger.info(f"Warm start for '{activity}' at {code} (level {level})")
+            return [self.root] + [dict(ancestor)["code"] for ancestor in ancestors] + [code]
+
+        logger.info(f"No confident warm start for '{activity}', starting at {self.root}")
+        return [self.root]
+
+    @contextmanager
+    def start_session(self, start: Optional[str] = None, path: Optional[List[str]] = None):
+        """
+        Open a fresh navigation session for the current run.
+
+        The session is stored in a context variable: the tasks created by the Runner
+        to call the tools inherit it, while concurrent runs each see their own.
+        """
+        session = self.new_session(start, path)
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
+
+    @property
+    def session(self) -> NavigationSession:
+        return _current_session.get() or self._default_session
+
+    @property
+    def current_code(self) -> str:
+        return self.session.current_code
+
+    @current_code.setter
+    def current_code(self, code: str) -> None:
+        self.session.current_code = code
+
+    @property
+    def history(self) -> List[str]:
+        return self.session.history
+
+    @history.setter
+    def history(self, history: List[str]) -> None:
+        self.session.history = history
 
     def get_tools(self):
         """
@@ -0,0 +1,208 @@
+import copy
+import json
+import logging
+import os
+from functools import lru_cache, wraps
+from inspect import iscoroutinefunction
+from typing import Any, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Token budget of a tool output when the tool has no budget of its own
+DEFAULT_BUDGET = int(os.environ.get("NAVIGATOR_PAYLOAD_BUDGET", 800))
+
+# Budgets of the tools whose outputs are naturally larger
+DEFAULT_BUDGETS = {
+    "get_current_information": 600,
+    "get_code_information": 400,
+    "get_codes_information": 1200,
+    "expand_current_node": 1500,
+    "get_current_children": 600,
+    "get_current_siblings": 800,
+    "get_current_descendants": 1500,
+    "get_context_summary": 400,
+}
+
+# Text fields, from the first to be shortened to the last
+FIELD_PRIORITY = (
+    "implementation_rule",
+    "includes_also",
+    "excludes",
+    "includes",
+    "description",
+)
+
+# Length (in characters) text fields are first cut to, before being dropped
+MIN_FIELD_CHARS = 200
+
+
+def parse_budgets(spec: str) -> Dict[str, int]:
+    """Budgets given as "tool=tokens,tool=tokens" (e.g. NAVIGATOR_PAYLOAD_BUDGETS)."""
+    budgets = {}
+    for item in spec.split(","):
+        if item.strip():
+            tool, tokens = item.split("=")
+            budgets[tool.strip()] = int(tokens)
+    return budgets
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: Optional[str] = None) -> Callable[[str], int]:
+    """
+    Token counter of the generation model: its tiktoken encoding for OpenAI models, else
+    its Hugging Face tokenizer, else an estimate of 4 characters per token.
+    """
+    model = model or os.environ.get("GENERATION_MODEL", "")
+    try:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model(model)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        pass
+
+    try:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(model)
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    except Exception:
+        logger.warning(f"No tokenizer found for model '{model}', counting 4 characters per token")
+
+    return lambda text: (len(text) + 3) // 4
+
+
+class ToolPayloadStats(BaseModel):
+    calls: int = 0
+    tokens: int = 0
+    max_tokens: int = 0
+    shaped: int = 0
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cut a text to max_chars, at the last sentence or word boundary when there is one."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary < max_chars // 2:
+        boundary = cut.rfind(" ")
+    return (cut[: boundary + 1] if boundary > 0 else cut).rstrip() + "…"
+
+
+def _rows(payload: Any):
+    """All the dicts of a payload (nested lists of children included)."""
+    if isinstance(payload, dict):
+        yield payload
+        for value in payload.values():
+            if isinstance(value, (dict, list)):
+                yield from _rows(value)
+    elif isinstance(payload, list):
+        for item in payload:
+            yield from _rows(item)
+
+
+class PayloadShaper:
+    """
+    Keeps tool outputs within a token budget per tool, and accounts for the tokens emitted.
+
+    Outputs over budget are reduced by field priority: the least useful text fields
+    (implementation rules, then exclusions, inclusions, descriptions) are first cut to
+    MIN_FIELD_CHARS, then dropped. Lists are never shortened, so that every child or
+    sibling stays visible to the agent, even if the budget is exceeded. Budgets come from
+    DEFAULT_BUDGETS, overridden by NAVIGATOR_PAYLOAD_BUDGETS and by `budgets`.
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        default_budget: int = DEFAULT_BUDGET,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ):
+        self.budgets = {
+            **DEFAULT_BUDGETS,
+            **parse_budgets(os.environ.get("NAVIGATOR_PAYLOAD_BUDGETS", "")),
+            **(budgets or {}),
+        }
+        self.default_budget = default_budget
+        self.count_tokens = count_tokens or get_token_counter()
+        self.stats: Dict[str, ToolPayloadStats] = {}
+
+    def budget(self, tool: str) -> int:
+        return self.budgets.get(tool, self.default_budget)
+
+    def size(self, payload: Any) -> int:
+        """Tokens of the payload as sent to the model (JSON)."""
+        if isinstance(payload, str):
+            return self.count_tokens(payload)
+        return self.count_tokens(json.dumps(payload, ensure_ascii=False, default=str))
+
+    def shape(self, tool: str, payload: Any) -> Any:
+        """The payload reduced to the budget of `tool` if needed; emitted tokens are recorded."""
+        budget = self.budget(tool)
+        tokens = self.size(payload)
+        shaped = tokens > budget
+        if shaped:
+            payload, tokens = self._reduce(payload, budget)
+            logger.debug(f"Payload of {tool} reduced to {tokens} tokens (budget {budget})")
+
+        stats = self.stats.setdefault(tool, ToolPayloadStats())
+        stats.calls += 1
+        stats.tokens += tokens
+        stats.max_tokens = max(stats.max_tokens, tokens)
+        stats.shaped += shaped
+        return payload
+
+    def _reduce(self, payload: Any, budget: int):
+        # Lookups may share nested lists with the cache: work on a copy
+        payload = copy.deepcopy(payload)
+
+        for field in FIELD_PRIORITY:
+            for row in _rows(payload):
+                if isinstance(row.get(field), str):
+                    row[field] = _truncate(row[field], MIN_FIELD_CHARS)
+            tokens = self.size(payload)
+            if tokens <= budget:
+                return payload, tokens
+
+        for field in FIELD_PRIORITY:
+            for row in _rows(payload):
+                row.pop(field, None)
+            tokens = self.size(payload)
+            if tokens <= budget:
+                return payload, tokens
+
+        # Lists of codes are never shortened: a code cut from them could not be chosen
+        logger.warning(f"Payload still {tokens} tokens without text fields (budget {budget})")
+        return payload, tokens
+
+    def wrap(self, tool: Callable) -> Callable:
+        """Tool function whose output goes through shape (same name, signature, docstring)."""
+        if iscoroutinefunction(tool):
+
+            @wraps(tool)
+            async def shaped_tool(*args, **kwargs):
+                return self.shape(tool.__name__, await tool(*args, **kwargs))
+
+        else:
+
+            @wraps(tool)
+            def shaped_tool(*args, **kwargs):
+                return self.shape(tool.__name__, tool(*args, **kwargs))
+
+        return shaped_tool
+
+    def report(self) -> str:
+        """Emitted tokens per tool, largest total first."""
+        lines = ["Tool payload tokens:"]
+        for tool, stats in sorted(self.stats.items(), key=lambda item: -item[1].tokens):
+            mean = stats.tokens / stats.calls if stats.calls else 0.0
+            lines.append(
+                f"  {tool:<28} {stats.calls:6d} calls  {stats.tokens:9d} tokens  "
+                f"mean {mean:7.1f}  max {stats.max_tokens:6d}  shaped {stats.shaped:5d}"
+            )
+        report = "\n".join(lines)
+        logger.info(report)
+        return report
@@ -0,0 +1,170 @@
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from pydantic import BaseModel
+
+from src.utils.metrics import count
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("GRAPH_CACHE_MAX_ENTRIES", 8192))
+DEFAULT_MAX_BYTES = int(os.environ.get("GRAPH_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+_MISSING = object()
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+    max_entries: int = 0
+    max_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _approx_size(value: Any) -> int:
+    """Rough deep size (in bytes) of the frozen structures stored in the cache."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list, set, frozenset)):
+        size += sum(_approx_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    return size
+
+
+class GraphCache:
+    """
+    LRU cache for graph lookups, bounded both by number of entries and by memory.
+
+    Keys are namespaced by nomenclature version so that every Graph (or Navigator)
+    pointing to the same nomenclature shares the same entries. Thread-safe.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._size_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = _approx_size(value)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._size_bytes -= previous[1]
+
+            self._data[key] = (value, size)
+            self._size_bytes += size
+
+            while len(self._data) > self.max_entries or self._size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._size_bytes -= evicted_size
+                self._evictions += 1
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Drop every entry, or only those of a given nomenclature version."""
+        with self._lock:
+            if namespace is None:
+                self._data.clear()
+                self._size_bytes = 0
+                return
+
+            for key in [k for k in self._data if k[0] == namespace]:
+                _, size = self._data.pop(key)
+                self._size_bytes -= size
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._data),
+                size_bytes=self._size_bytes,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+            )
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
+_graph_cache: Optional[GraphCache] = None
+_graph_cache_lock = threading.Lock()
+
+
+def get_graph_cache() -> GraphCache:
+    """Return the process-wide cache shared by all Graph instances."""
+    global _graph_cache
+    with _graph_cache_lock:
+        if _graph_cache is None:
+            _graph_cache = GraphCache()
+        return _graph_cache
+
+
+def configure_graph_cache(
+    max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES
+) -> GraphCache:
+    """Replace the process-wide cache with a new one using the given bounds."""
+    global _graph_cache
+    with _graph_cache_lock:
+        _graph_cache = GraphCache(max_entries=max_entries, max_bytes=max_bytes)
+        return _graph_cache
+
+
+def cached_lookup(method: Callable) -> Callable:
+    """
+    Cache the (frozen) result of a Graph lookup method in the shared GraphCache.
+
+    The key is (nomenclature_version, method name, args): it does not depend on the
+    instance, so a result fetched by one Graph is reused by all the others.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args):
+        # In snapshot mode the lookup is already an in-memory access, no need to cache it
+        if getattr(self, "snapshot", None) is not None:
+            return method(self, *args)
+
+        key = (self.nomenclature_version, method.__name__, args)
+        value = self.cache.get(key, _MISSING)
+        if value is _MISSING:
+            count("graph_cache_misses", lookup=method.__name__)
+            value = method(self, *args)
+            self.cache.set(key, value)
+        else:
+            count("graph_cache_hits", lookup=method.__name__)
+        return value
+
+    return wrapper
@@ -0,0 +1,63 @@
+import atexit
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_neo4j import Neo4jGraph
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class Neo4JConfig(BaseModel):
+    url: str
+    username: str
+    password: str
+    # Connection pool settings, shared by every user of the same config in the process
+    max_connection_pool_size: int = 50
+    connection_acquisition_timeout: float = 60.0
+    # Connections idle for longer than this are checked before being reused (seconds)
+    liveness_check_timeout: Optional[float] = 30.0
+
+
+_graphs: Dict[Tuple[Any, ...], Neo4jGraph] = {}
+_lock = threading.Lock()
+
+
+def _key(config: Neo4JConfig) -> Tuple[Any, ...]:
+    # Every setting is part of the key: a different password or pool gets its own driver
+    return tuple(config.model_dump().values())
+
+
+def get_neo4j_graph(config: Neo4JConfig, enhanced_schema: bool = True) -> Neo4jGraph:
+    """
+    Return the process-wide Neo4jGraph for this config. Its driver, configured with the
+    pool settings of the config, is the one connection pool shared by every user.
+    """
+    with _lock:
+        graph = _graphs.get(_key(config))
+        if graph is None:
+            logger.info(f"🔗 Opening Neo4j connection pool to {config.url}")
+            graph = Neo4jGraph(
+                url=config.url,
+                username=config.username,
+                password=config.password,
+                refresh_schema=True,
+                enhanced_schema=enhanced_schema,
+                driver_config={
+                    "max_connection_pool_size": config.max_connection_pool_size,
+                    "connection_acquisition_timeout": config.connection_acquisition_timeout,
+                    "liveness_check_timeout": config.liveness_check_timeout,
+                },
+            )
+            _graphs[_key(config)] = graph
+        return graph
+
+
+@atexit.register
+def close_graphs() -> None:
+    """Close the driver of every shared graph (registered at exit)."""
+    with _lock:
+        for graph in _graphs.values():
+            graph.close()
+        _graphs.clear()
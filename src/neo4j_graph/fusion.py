@@ -0,0 +1,23 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+# Constant of reciprocal rank fusion (the value of the original paper, robust in practice)
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = RRF_K
+) -> List[Tuple[str, float]]:
+    """
+    Fuse several rankings of codes: score(code) = sum over rankings of 1 / (k + rank).
+
+    Ranks start at 1. Only ranks are used, so sources with incomparable scores (BM25 and
+    cosine similarity) can be mixed. Ties are broken by best rank, then by code.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    best_rank: Dict[str, int] = {}
+    for ranking in rankings:
+        for rank, code in enumerate(ranking, start=1):
+            scores[code] += 1.0 / (k + rank)
+            best_rank[code] = min(rank, best_rank.get(code, rank))
+    return sorted(scores.items(), key=lambda item: (-item[1], best_rank[item[0]], item[0]))
@@ -1,18 +1,39 @@
+import asyncio
+import contextvars
 import logging
 import os
-from functools import lru_cache
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
 from langchain_neo4j import Neo4jGraph, Neo4jVector
 from langchain_openai import OpenAIEmbeddings
-from pydantic import BaseModel
 
 from agents import function_tool
+from src.embeddings import BatchingEmbeddings, CachedEmbeddings, get_embedding_cache
+from src.embeddings.batching import DEFAULT_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+from src.embeddings.cache import DEFAULT_CACHE_PATH
+from src.neo4j_graph.cache import CacheStats, cached_lookup, get_graph_cache
+from src.neo4j_graph.connection import Neo4JConfig, get_neo4j_graph
+from src.neo4j_graph.fusion import RRF_K, reciprocal_rank_fusion
+from src.neo4j_graph.local_index import LocalVectorIndex
+from src.neo4j_graph.snapshot import SEARCH_LIMIT, NomenclatureSnapshot
+from src.neo4j_graph.text_index import to_lucene_query
+from src.utils.metrics import count, span, traced
 
 logger = logging.getLogger(__name__)
 load_dotenv(override=True)
 
+# Blocking Neo4j lookups are offloaded to this bounded pool so that they do not
+# block the event loop (and stay below the driver connection pool size)
+_query_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("GRAPH_QUERY_THREADS", 16)),
+    thread_name_prefix="graph-query",
+)
+
+SEARCH_MODES = ("vector", "hybrid", "two_stage")
+
 
 def _freeze_dict(d: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
     """Convert dict to immutable tuple for caching."""
@@ -34,7 +55,8 @@ def _unfreeze_list_of_dicts(t: Tuple[Tuple[Tuple[str, Any], ...], ...]) -> List[
 
 def make_tools(graph):
     @function_tool
-    def get_code_information(code: str) -> Dict[str, Any]:
+    @traced("tool")
+    async def get_code_information(code: str) -> Dict[str, Any]:
         """
         Retourne les informations complètes d'un code NACE.
 
@@ -45,11 +67,12 @@ def make_tools(graph):
             Dictionnaire avec code, level, name, description, includes, includes_also,
             excludes, implementation_rule, parent_code, children_codes, children_count
         """
-        data = graph._cached_get_code_information(code)
+        data = await graph.arun(graph._cached_get_code_information, code)
         return _unfreeze_dict(data) if data else {"error": f"Code {code} not found"}
 
     @function_tool
-    def get_children(code: str) -> List[Dict[str, Any]]:
+    @traced("tool")
+    async def get_children(code: str) -> List[Dict[str, Any]]:
         """
         Retourne les enfants directs d'un code (niveau N+1).
 
@@ -59,10 +82,11 @@ def make_tools(graph):
         Returns:
             Liste des codes enfants avec code, level, name, description, includes, excludes
         """
-        return _unfreeze_list_of_dicts(graph._cached_get_children(code))
+        return _unfreeze_list_of_dicts(await graph.arun(graph._cached_get_children, code))
 
     @function_tool
-    def get_descendants(code: str, levels: int = 2) -> List[Dict[str, Any]]:
+    @traced("tool")
+    async def get_descendants(code: str, levels: int = 2) -> List[Dict[str, Any]]:
         """
         Retourne les descendants d'un code jusqu'à N niveaux de profondeur.
 
@@ -73,10 +97,13 @@ def make_tools(graph):
         Returns:
             Liste de tous les descendants jusqu'au niveau spécifié
         """
-        return _unfreeze_list_of_dicts(graph._cached_get_descendants(code, levels))
+        return _unfreeze_list_of_dicts(
+            await graph.arun(graph._cached_get_descendants, code, levels)
+        )
 
     @function_tool
-    def get_siblings(code: str) -> List[Dict[str, Any]]:
+    @traced("tool")
+    async def get_siblings(code: str) -> List[Dict[str, Any]]:
         """
         Retourne les codes au même niveau hiérarchique (même parent).
 
@@ -86,10 +113,11 @@ def make_tools(graph):
         Returns:
             Liste des codes siblings (excluant le code d'origine)
         """
-        return _unfreeze_list_of_dicts(graph._cached_get_siblings(code))
+        return _unfreeze_list_of_dicts(await graph.arun(graph._cached_get_siblings, code))
 
     @function_tool
-    def get_parent(code: str) -> Optional[Dict[str, Any]]:
+    @traced("tool")
+    async def get_parent(code: str) -> Optional[Dict[str, Any]]:
         """
         Retourne le parent direct d'un code (niveau N-1).
 
@@ -99,34 +127,167 @@ def make_tools(graph):
         Returns:
             Dictionnaire du parent ou None si pas de parent
         """
-        data = graph._cached_get_parent(code)
+        data = await graph.arun(graph._cached_get_parent, code)
         return _unfreeze_dict(data) if data else None
 
-    return [get_code_information, get_children, get_descendants, get_siblings, get_parent]
+    @function_tool
+    @traced("tool")
+    async def get_ancestors(code: str) -> List[Dict[str, Any]]:
+        """
+        Retourne tous les ancêtres d'un code, de la section jusqu'au parent direct.
 
+        Args:
+            code: Code dont on cherche les ancêtres
+
+        Returns:
+            Liste des ancêtres (code, level, name, description), du plus général au parent
+        """
+        return _unfreeze_list_of_dicts(await graph.arun(graph._cached_get_ancestors, code))
+
+    @function_tool
+    @traced("tool")
+    async def search_codes(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Recherche des codes par mots-clés dans les libellés et les notes explicatives.
+
+        Args:
+            query: Mots-clés (ex: "boulangerie pâtisserie")
+            limit: Nombre maximum de résultats (défaut: 10)
+
+        Returns:
+            Liste des codes (code, level, name, description, score), du plus pertinent au moins
+            pertinent
+        """
+        return _unfreeze_list_of_dicts(await graph.arun(graph._cached_search_codes, query, limit))
+
+    @function_tool
+    @traced("tool")
+    async def get_codes_information(codes: List[str]) -> List[Dict[str, Any]]:
+        """
+        Retourne les informations complètes de plusieurs codes NACE en un seul appel.
+        À préférer à plusieurs appels de get_code_information pour comparer des codes.
+
+        Args:
+            codes: Liste de codes NACE (ex: ["62.01", "62.02"])
+
+        Returns:
+            Liste des informations de chaque code trouvé, dans l'ordre demandé
+        """
+        return _unfreeze_list_of_dicts(await graph.arun(graph.get_codes_information, codes))
+
+    @function_tool
+    @traced("tool")
+    async def expand_node(code: str) -> Dict[str, Any]:
+        """
+        Retourne en un seul appel un code, son parent et ses enfants avec leurs notes
+        explicatives.
+
+        Args:
+            code: Code NACE à développer
+
+        Returns:
+            Informations du code, avec parent (code, level, name, description), children
+            (code, level, final, name, description, includes, excludes) et siblings_count
+        """
+        data = await graph.arun(graph._cached_expand_node, code)
+        return _unfreeze_dict(data) if data else {"error": f"Code {code} not found"}
 
-class Neo4JConfig(BaseModel):
-    url: str
-    username: str
-    password: str
+    return [
+        get_code_information,
+        get_codes_information,
+        expand_node,
+        get_children,
+        get_descendants,
+        get_siblings,
+        get_parent,
+        get_ancestors,
+        search_codes,
+    ]
 
 
 class Graph:
-    def __init__(self, neo4j_config: Neo4JConfig) -> None:
-        self.graph = Neo4jGraph(
-            url=neo4j_config.url,
-            username=neo4j_config.username,
-            password=neo4j_config.password,
-            enhanced_schema=True,
+    def __init__(
+        self,
+        neo4j_config: Neo4JConfig,
+        nomenclature_version: Optional[str] = None,
+        snapshot: bool = False,
+        snapshot_path: Optional[str] = None,
+        embedding_cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+        retriever: str = "neo4j",
+        local_index_dtype: str = "float32",
+        embedding_batch_size: int = DEFAULT_BATCH_SIZE,
+        embedding_max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        search_mode: Optional[str] = None,
+        hybrid_source_top_k: int = 20,
+        rrf_k: int = RRF_K,
+        coarse_level: int = 2,
+        coarse_top_k: int = 3,
+    ) -> None:
+        # Lookups are cached per nomenclature version, shared by all Graph instances
+        self.nomenclature_version = nomenclature_version or os.environ.get(
+            "NOMENCLATURE_VERSION", "NAF2025"
+        )
+        self.cache = get_graph_cache()
+
+        self.graph = self._connect(neo4j_config)
+
+        model_name, emb_model = self._embedding_api()
+        # Concurrent query embeddings are sent to the API in micro-batches
+        if embedding_batch_size > 1:
+            emb_model = BatchingEmbeddings(
+                emb_model, max_batch_size=embedding_batch_size, max_wait_ms=embedding_max_wait_ms
+            )
+        # Query embeddings are cached in memory and on disk (None: memory only)
+        self.emb_model = CachedEmbeddings(
+            emb_model,
+            model=model_name,
+            cache=get_embedding_cache(embedding_cache_path),
         )
 
-        self.emb_model = OpenAIEmbeddings(
-            model=os.environ["EMBEDDING_MODEL"],
+        self.db = self._vector_store()
+
+        # Snapshot mode: the whole tree is held in memory and answers the lookups
+        self.snapshot: Optional[NomenclatureSnapshot] = None
+        if snapshot or snapshot_path:
+            self.load_snapshot(snapshot_path)
+
+        # Retriever used by get_closest_codes: "neo4j" (vector index) or "local" (in RAM)
+        if retriever not in ("neo4j", "local"):
+            raise ValueError(f"Unknown retriever {retriever}, expected 'neo4j' or 'local'")
+        self.retriever = retriever
+        self.local_index: Optional[LocalVectorIndex] = None
+        if retriever == "local":
+            self.local_index = self._build_local_index(local_index_dtype)
+
+        # Ranking used by get_closest_codes: "vector" only, "hybrid" (keyword + vector, RRF)
+        # or "two_stage" (coarse codes first, then FINAL codes inside their subtrees)
+        self.search_mode = search_mode or os.environ.get("RETRIEVAL_MODE", "vector")
+        if self.search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {self.search_mode}, expected {SEARCH_MODES}")
+        self.hybrid_source_top_k = hybrid_source_top_k
+        self.rrf_k = rrf_k
+        self.coarse_level = coarse_level
+        self.coarse_top_k = coarse_top_k
+
+    # ------------------------------------------------------------------
+    # Backends (overridden to run without Neo4j nor an embedding API)
+    # ------------------------------------------------------------------
+
+    def _connect(self, neo4j_config: Neo4JConfig) -> Optional[Neo4jGraph]:
+        # Shared by all Graph instances using the same config (one pooled driver per process)
+        return get_neo4j_graph(neo4j_config)
+
+    def _embedding_api(self) -> Tuple[str, Embeddings]:
+        """Name and client of the query embedding model."""
+        model_name = os.environ["EMBEDDING_MODEL"]
+        return model_name, OpenAIEmbeddings(
+            model=model_name,
             openai_api_base=os.environ["URL_EMBEDDING_API"],
             openai_api_key=os.environ["OPENAI_API_KEY"],
         )
 
-        self.db = Neo4jVector.from_existing_graph(
+    def _vector_store(self) -> Optional[Neo4jVector]:
+        return Neo4jVector.from_existing_graph(
             graph=self.graph,
             embedding=self.emb_model,
             index_name="id",
@@ -137,6 +298,9 @@ class Graph:
             search_type="vector",
         )
 
+    def _build_local_index(self, dtype: str) -> LocalVectorIndex:
+        return LocalVectorIndex.from_graph(self.graph, dtype=dtype)
+
     # ------------------------------------------------------------------
     # Get tools
     # ------------------------------------------------------------------
@@ -150,65 +314,366 @@ class Graph:
         """
         return make_tools(self)
 
-    async def get_closest_codes(self, activity: str, top_k: int = 5) -> List[str]:
-        retrieval = await self.db.asimilarity_search(
-            f"query : {activity}", k=top_k, filter={"FINAL": 1}
+    @traced("retrieval")
+    async def get_closest_codes(
+        self, activity: str, top_k: int = 5, mode: Optional[str] = None
+    ) -> List[str]:
+        return [code for code, _ in await self.search_closest_codes(activity, top_k, mode)]
+
+    @traced("retrieval")
+    async def search_closest_codes(
+        self, activity: str, top_k: int = 5, mode: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Closest FINAL codes to the activity, with their score.
+
+        Scores are similarities in "vector" and "two_stage" modes, reciprocal rank fusion
+        scores in "hybrid" mode (`mode` defaults to the search_mode of the Graph).
+        """
+        mode = mode or self.search_mode
+        if mode == "hybrid":
+            return await self.search_hybrid_codes(activity, top_k)
+        if mode == "two_stage":
+            return await self.search_two_stage_codes(activity, top_k)
+        return await self.search_vector_codes(activity, top_k)
+
+    async def search_vector_codes(
+        self,
+        activity: str,
+        top_k: int = 5,
+        under: Optional[Union[str, Sequence[str]]] = None,
+        level: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Closest codes by embedding similarity: FINAL codes, or codes of `level` if given,
+        restricted to the subtrees of the `under` code(s) if given.
+        """
+        query = f"query : {activity}"
+        # Embed through the (cached) embedding model, then search by vector
+        embedding = await self.emb_model.aembed_query(query)
+        return await self._search_by_vector(embedding, query, top_k, under, level)
+
+    async def search_two_stage_codes(
+        self,
+        activity: str,
+        top_k: int = 5,
+        coarse_level: Optional[int] = None,
+        coarse_top_k: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Hierarchical retrieval: the `coarse_top_k` closest codes of `coarse_level` (e.g.
+        divisions) first, then the closest FINAL codes inside their subtrees only.
+        """
+        query = f"query : {activity}"
+        embedding = await self.emb_model.aembed_query(query)
+        coarse = await self._search_by_vector(
+            embedding,
+            query,
+            coarse_top_k or self.coarse_top_k,
+            level=coarse_level or self.coarse_level,
+        )
+        logger.debug(f"Two-stage search for '{activity}' restricted to {coarse}")
+        results = await self._search_by_vector(
+            embedding, query, top_k, under=[code for code, _ in coarse]
         )
-        return [item.metadata["CODE"] for item in retrieval]
+        if len(results) < top_k:
+            # Fewer leaves than requested under the coarse codes: complete with a full search
+            found = {code for code, _ in results}
+            extra = await self._search_by_vector(embedding, query, top_k)
+            results += [(code, score) for code, score in extra if code not in found]
+        return results[:top_k]
+
+    async def _search_by_vector(
+        self,
+        embedding: List[float],
+        query: str,
+        top_k: int,
+        under: Optional[Union[str, Sequence[str]]] = None,
+        level: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        subtrees = None
+        if under is not None:
+            codes = [under] if isinstance(under, str) else list(under)
+            intervals = await asyncio.gather(
+                *(self.arun(self._cached_get_interval, code) for code in codes)
+            )
+            subtrees = [interval for interval in intervals if interval]
+            if not subtrees:
+                return []
+
+        if self.local_index is not None:
+            return self.local_index.search(embedding, top_k, level=level, subtrees=subtrees)
+
+        filter = {"LEVEL": level} if level is not None else {"FINAL": 1}
+        if subtrees:
+            # Pre-order ranges: the filtered (exact) search only scores the subtree nodes
+            filter["$or"] = [
+                {"$and": [{"PRE": {"$gt": pre}}, {"PRE": {"$lte": post}}]} for pre, post in subtrees
+            ]
+        retrieval = await self._run_in_pool(
+            self._similarity_search, embedding, top_k, filter, query
+        )
+        return [(item.metadata["CODE"], score) for item, score in retrieval]
+
+    async def score_codes(self, embedding: List[float], codes: Sequence[str]) -> Dict[str, float]:
+        """
+        Similarity of each given code (any level) to a query embedding, on the scale of the
+        vector searches. Codes without a stored embedding are left out.
+        """
+        if not codes:
+            return {}
+        if self.local_index is not None:
+            return self.local_index.score_codes(embedding, codes)
+
+        # vector.similarity.cosine is normalised to [0, 1], like the vector index scores
+        query = """
+        MATCH (node:Code)
+        WHERE node.CODE IN $codes AND node.embedding IS NOT NULL
+        RETURN node.CODE as code,
+               vector.similarity.cosine(node.embedding, $embedding) as score
+        """
+        result = await self.aquery(query, {"codes": list(codes), "embedding": embedding})
+        return {row["code"]: row["score"] for row in result}
+
+    def _similarity_search(self, embedding, top_k, filter, query):
+        count("neo4j_queries")
+        with span("neo4j:vector_search"):
+            return self.db.similarity_search_with_score_by_vector(
+                embedding, k=top_k, filter=filter, query=query
+            )
+
+    async def search_keyword_codes(self, activity: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """FINAL codes whose labels or notes match the words of the activity (BM25 scores)."""
+        results = await self.arun(self._cached_search_codes, activity, top_k, True)
+        return [(dict(result)["code"], dict(result)["score"]) for result in results]
+
+    async def search_hybrid_codes(
+        self,
+        activity: str,
+        top_k: int = 5,
+        vector_top_k: Optional[int] = None,
+        keyword_top_k: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Fuse the vector and keyword rankings with reciprocal rank fusion.
+
+        Each source returns its own top-k (default: hybrid_source_top_k, at least top_k)
+        before fusion, so exact trade words ("boulangerie", "VTC") missed by the embedding
+        can still reach the final top_k.
+        """
+        vector_top_k = vector_top_k or max(top_k, self.hybrid_source_top_k)
+        keyword_top_k = keyword_top_k or max(top_k, self.hybrid_source_top_k)
+        vector, keyword = await asyncio.gather(
+            self.search_vector_codes(activity, vector_top_k),
+            self.search_keyword_codes(activity, keyword_top_k),
+        )
+        fused = reciprocal_rank_fusion(
+            [[code for code, _ in vector], [code for code, _ in keyword]], k=self.rrf_k
+        )
+        return fused[:top_k]
+
+    @traced("retrieval")
+    async def search_closest_codes_batch(
+        self, activities: List[str], top_k: int = 5
+    ) -> List[List[Tuple[str, float]]]:
+        """Batched search_closest_codes: one embedding request, one matrix product if local."""
+        if self.local_index is None or self.search_mode != "vector":
+            return await asyncio.gather(
+                *(self.search_closest_codes(activity, top_k) for activity in activities)
+            )
+
+        embeddings = await self.emb_model.aembed_documents(
+            [f"query : {activity}" for activity in activities]
+        )
+        return self.local_index.search_batch(embeddings, top_k)
+
+    # ------------------------------------------------------------------
+    # Async access
+    # ------------------------------------------------------------------
+
+    async def arun(self, func, *args):
+        """
+        Await a blocking lookup (e.g. a _cached_* method) without blocking the event loop.
+
+        Snapshot lookups are in-memory and run inline; Neo4j lookups run in the bounded
+        query thread pool, with the caller's context variables.
+        """
+        if self.snapshot is not None:
+            return func(*args)
+        return await self._run_in_pool(func, *args)
+
+    def query(self, query: str, params: Optional[Dict[str, Any]] = None):
+        """Run a Cypher query on Neo4j (counted and timed in the metrics)."""
+        count("neo4j_queries")
+        with span("neo4j:query"):
+            return self.graph.query(query, params=params or {})
+
+    async def aquery(self, query: str, params: Optional[Dict[str, Any]] = None):
+        """Async counterpart of query."""
+        return await self._run_in_pool(self.query, query, params)
+
+    async def _run_in_pool(self, func, *args):
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(_query_executor, ctx.run, func, *args)
 
     # ------------------------------------------------------------------
     # Cache management
     # ------------------------------------------------------------------
 
     def clear_caches(self) -> None:
-        """Clear all internal caches (call on data reload)."""
-        self._cached_get_code_information.cache_clear()
-        self._cached_get_children.cache_clear()
-        self._cached_get_descendants.cache_clear()
-        self._cached_get_siblings.cache_clear()
-        self._cached_get_parent.cache_clear()
-        self._cached_search_codes.cache_clear()
+        """Clear the cached lookups of this nomenclature version (call on data reload)."""
+        self.cache.clear(self.nomenclature_version)
+
+    def cache_stats(self) -> CacheStats:
+        """Hit, miss and eviction counters of the shared lookup cache."""
+        return self.cache.stats()
+
+    # ------------------------------------------------------------------
+    # Snapshot management
+    # ------------------------------------------------------------------
+
+    def load_snapshot(self, path: Optional[str] = None, refresh: bool = False) -> None:
+        """
+        Load the nomenclature tree in memory and answer navigation lookups from it.
+
+        Args:
+            path: Local file used to persist the snapshot (warm restarts skip the Neo4j dump)
+            refresh: Ignore the local file and dump Neo4j again
+        """
+        if refresh or path is None:
+            self.snapshot = NomenclatureSnapshot.from_graph(self.graph, self.nomenclature_version)
+            if path:
+                self.snapshot.save(path)
+        else:
+            self.snapshot = NomenclatureSnapshot.load_or_build(
+                self.graph, self.nomenclature_version, path
+            )
+        self.clear_caches()
 
     # ------------------------------------------------------------------
     # get_code_information
     # ------------------------------------------------------------------
 
-    @lru_cache(maxsize=0)
+    @cached_lookup
     def _cached_get_code_information(self, code: str) -> Tuple[Tuple[str, Any], ...]:
+        if self.snapshot is not None:
+            return self.snapshot.get_code_information(code)
+
+        logger.info(f"_cached_get_code_information called with code {code}")
+        info = self._query_codes_information([code]).get(code, ())
+        if not info:
+            logger.info("No result in _cached_get_code_information")
+        return info
+
+    def get_codes_information(
+        self, codes: Sequence[str]
+    ) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+        """
+        Information of several codes, in the given order (unknown codes left out).
+
+        Shares the per-code entries of _cached_get_code_information: only the codes
+        missing from the cache are fetched, all with one query.
+        """
+        codes = list(dict.fromkeys(codes))
+        if self.snapshot is not None:
+            return self.snapshot.get_codes_information(codes)
+
+        keys = {
+            code: (self.nomenclature_version, "_cached_get_code_information", (code,))
+            for code in codes
+        }
+        found = {code: self.cache.get(keys[code]) for code in codes}
+        missing = [code for code, info in found.items() if info is None]
+        count("graph_cache_hits", len(codes) - len(missing), lookup="get_codes_information")
+        count("graph_cache_misses", len(missing), lookup="get_codes_information")
+        if missing:
+            fetched = self._query_codes_information(missing)
+            for code in missing:
+                found[code] = fetched.get(code, ())
+                self.cache.set(keys[code], found[code])
+        return tuple(found[code] for code in codes if found[code])
+
+    def _query_codes_information(self, codes: List[str]) -> Dict[str, Tuple[Tuple[str, Any], ...]]:
         query = """
-        MATCH (node {CODE: $code})
+        UNWIND $codes as code
+        MATCH (node:Code {CODE: code})
         OPTIONAL MATCH (node)<-[:HAS_CHILD]-(parent)
-        OPTIONAL MATCH (node)-[:HAS_CHILD]->(child)
-        WITH node, parent, collect({code: child.CODE, name: child.NAME}) as children
+        WITH node, parent,
+             [(node)-[:HAS_CHILD]->(child) | {code: child.CODE, name: child.NAME}] as children
         RETURN node.CODE as code,
-       node.LEVEL as level,
-       node.NAME as name,
-       node.text as description,
-       node.Includes as includes,
-       node.IncludesAlso as includes_also,
-       node.Excludes as excludes,
-       node.Implementation_rule as implementation_rule,
-       parent.CODE as parent_code,
-       children,
-       size(children) as children_count
+               node.LEVEL as level,
+               node.NAME as name,
+               node.text as description,
+               node.Includes as includes,
+               node.IncludesAlso as includes_also,
+               node.Excludes as excludes,
+               node.Implementation_rule as implementation_rule,
+               parent.CODE as parent_code,
+               children,
+               size(children) as children_count
         """
-        logger.info(f"_cached_get_code_information called with code {code}")
-        result = self.graph.query(query, params={"code": code})
+        result = self.query(query, params={"codes": codes})
+        return {row["code"]: _freeze_dict(row) for row in result}
+
+    # ------------------------------------------------------------------
+    # expand_node
+    # ------------------------------------------------------------------
 
+    @cached_lookup
+    def _cached_expand_node(self, code: str) -> Tuple[Tuple[str, Any], ...]:
+        if self.snapshot is not None:
+            return self.snapshot.expand_node(code)
+
+        query = """
+        MATCH (node:Code {CODE: $code})
+        OPTIONAL MATCH (node)<-[:HAS_CHILD]-(parent)
+        RETURN node.CODE as code,
+               node.LEVEL as level,
+               node.NAME as name,
+               node.text as description,
+               node.Includes as includes,
+               node.IncludesAlso as includes_also,
+               node.Excludes as excludes,
+               node.Implementation_rule as implementation_rule,
+               CASE WHEN parent IS NULL THEN NULL ELSE {
+                   code: parent.CODE,
+                   level: parent.LEVEL,
+                   name: parent.NAME,
+                   description: parent.text
+               } END as parent,
+               [(node)-[:HAS_CHILD]->(child) | {
+                   code: child.CODE,
+                   level: child.LEVEL,
+                   final: child.FINAL,
+                   name: child.NAME,
+                   description: child.text,
+                   includes: child.Includes,
+                   excludes: child.Excludes
+               }] as children,
+               CASE WHEN parent IS NULL THEN 0
+                    ELSE size([(parent)-[:HAS_CHILD]->(sibling) | sibling]) - 1
+               END as siblings_count
+        """
+        result = self.query(query, params={"code": code})
         if not result:
-            logger.info("No result in _cached_get_code_information")
             return ()
 
-        return _freeze_dict(result[0])
+        node = result[0]
+        node["children"] = sorted(node["children"], key=lambda child: child["code"])
+        return _freeze_dict(node)
 
     # ------------------------------------------------------------------
     # get_children
     # ------------------------------------------------------------------
 
-    @lru_cache(maxsize=0)
+    @cached_lookup
     def _cached_get_children(self, code: str) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+        if self.snapshot is not None:
+            return self.snapshot.get_children(code)
+
         query = """
-        MATCH (node {CODE: $code})-[:HAS_CHILD]->(child)
+        MATCH (node:Code {CODE: $code})-[:HAS_CHILD]->(child)
         RETURN child.CODE as code,
                child.LEVEL as level,
                child.FINAL as final,
@@ -218,19 +683,26 @@ class Graph:
                child.Excludes as excludes
         ORDER BY code
         """
-        result = self.graph.query(query, params={"code": code})
+        result = self.query(query, params={"code": code})
         return _freeze_list_of_dicts(result)
 
     # ------------------------------------------------------------------
     # get_descendants
     # ------------------------------------------------------------------
 
-    @lru_cache(maxsize=0)
+    @cached_lookup
     def _cached_get_descendants(
         self, code: str, levels: int
     ) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
-        query = f"""
-        MATCH (node {{CODE: $code}})-[:HAS_CHILD*{levels}]->(descendant)
+        if self.snapshot is not None:
+            return self.snapshot.get_descendants(code, levels)
+
+        # Subtree = pre-order range (PRE index seek), one plan whatever the depth
+        query = """
+        MATCH (node:Code {CODE: $code})
+        MATCH (descendant:Code)
+        WHERE node.PRE < descendant.PRE <= node.POST
+          AND descendant.DEPTH <= node.DEPTH + $levels
         RETURN descendant.CODE as code,
                descendant.LEVEL as level,
                descendant.NAME as name,
@@ -239,17 +711,20 @@ class Graph:
                descendant.Excludes as excludes
         ORDER BY descendant.CODE
         """
-        result = self.graph.query(query, params={"code": code})
+        result = self.query(query, params={"code": code, "levels": levels})
         return _freeze_list_of_dicts(result)
 
     # ------------------------------------------------------------------
     # get_siblings
     # ------------------------------------------------------------------
 
-    @lru_cache(maxsize=0)
+    @cached_lookup
     def _cached_get_siblings(self, code: str) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+        if self.snapshot is not None:
+            return self.snapshot.get_siblings(code)
+
         query = """
-        MATCH (node {CODE: $code})<-[:HAS_CHILD]-(parent)
+        MATCH (node:Code {CODE: $code})<-[:HAS_CHILD]-(parent)
         MATCH (parent)-[:HAS_CHILD]->(sibling)
         WHERE sibling.CODE <> $code
         RETURN sibling.CODE as code,
@@ -260,43 +735,105 @@ class Graph:
                sibling.Excludes as excludes
         ORDER BY sibling.CODE
         """
-        result = self.graph.query(query, params={"code": code})
+        result = self.query(query, params={"code": code})
         return _freeze_list_of_dicts(result)
 
     # ------------------------------------------------------------------
     # get_parent
     # ------------------------------------------------------------------
 
-    @lru_cache(maxsize=0)
+    @cached_lookup
     def _cached_get_parent(self, code: str) -> Tuple[Tuple[str, Any], ...]:
+        if self.snapshot is not None:
+            return self.snapshot.get_parent(code)
+
         query = """
-        MATCH (node {CODE: $code})<-[:HAS_CHILD]-(parent)
+        MATCH (node:Code {CODE: $code})<-[:HAS_CHILD]-(parent)
         RETURN parent.CODE as code,
                parent.LEVEL as level,
                parent.NAME as name,
                parent.text as description
         """
-        result = self.graph.query(query, params={"code": code})
+        result = self.query(query, params={"code": code})
         if not result:
             return ()
         return _freeze_dict(result[0])
 
     # ------------------------------------------------------------------
-    # search_codes 
+    # get_ancestors / get_interval / is_under
     # ------------------------------------------------------------------
 
-    @lru_cache(maxsize=0)
-    def _cached_search_codes(self, search_term: str) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+    @cached_lookup
+    def _cached_get_ancestors(self, code: str) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+        if self.snapshot is not None:
+            return self.snapshot.get_ancestors(code)
+
         query = """
-        MATCH (node)
-        WHERE toLower(node.NAME) CONTAINS toLower($search_term)
-           OR toLower(node.text) CONTAINS toLower($search_term)
+        MATCH (node:Code {CODE: $code})
+        MATCH (ancestor:Code)
+        WHERE ancestor.CODE IN node.ANCESTORS
+        RETURN ancestor.CODE as code,
+               ancestor.LEVEL as level,
+               ancestor.NAME as name,
+               ancestor.text as description
+        ORDER BY ancestor.DEPTH
+        """
+        result = self.query(query, params={"code": code})
+        return _freeze_list_of_dicts(result)
+
+    @cached_lookup
+    def _cached_get_interval(self, code: str) -> Tuple[int, ...]:
+        """Pre-order interval (PRE, POST) of the subtree of `code`, () if unknown."""
+        if self.snapshot is not None:
+            return self.snapshot.get_interval(code)
+
+        query = """
+        MATCH (node:Code {CODE: $code})
+        WHERE node.PRE IS NOT NULL
+        RETURN node.PRE as pre, node.POST as post
+        """
+        result = self.query(query, params={"code": code})
+        return (result[0]["pre"], result[0]["post"]) if result else ()
+
+    @cached_lookup
+    def _cached_is_under(self, code: str, ancestor: str) -> bool:
+        if self.snapshot is not None:
+            return self.snapshot.is_under(code, ancestor)
+
+        query = """
+        MATCH (node:Code {CODE: $code}), (ancestor:Code {CODE: $ancestor})
+        RETURN ancestor.PRE < node.PRE <= ancestor.POST as is_under
+        """
+        result = self.query(query, params={"code": code, "ancestor": ancestor})
+        return bool(result and result[0]["is_under"])
+
+    # ------------------------------------------------------------------
+    # search_codes
+    # ------------------------------------------------------------------
+
+    @cached_lookup
+    def _cached_search_codes(
+        self, search_term: str, limit: int = SEARCH_LIMIT, final_only: bool = False
+    ) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+        if self.snapshot is not None:
+            return self.snapshot.search_codes(search_term, limit, final_only)
+
+        lucene_query = to_lucene_query(search_term)
+        if not lucene_query:
+            return ()
+
+        query = """
+        CALL db.index.fulltext.queryNodes('code_search', $query)
+        YIELD node, score
+        WHERE NOT $final_only OR node.FINAL = 1
         RETURN node.CODE as code,
                node.LEVEL as level,
                node.NAME as name,
-               node.text as description
-        ORDER BY node.LEVEL, node.CODE
-        LIMIT 20
+               node.text as description,
+               round(score, 4) as score
+        LIMIT $limit
         """
-        result = self.graph.query(query, params={"search_term": search_term})
+        result = self.query(
+            query, params={"query": lucene_query, "limit": limit, "final_only": final_only}
+        )
         return _freeze_list_of_dicts(result)
@@ -1,3 +1,4 @@
+import argparse
 import logging
 
 from langchain_community.document_loaders import DataFrameLoader
@@ -8,20 +9,31 @@ from src.neo4j_graph.graph_builder.config import (
     MAX_TOKENS,
     NOTICES_PATH,
 )
-
 from src.neo4j_graph.graph_builder.utils.db_manager import (
+    clean_graph,
+    create_hierarchy,
     create_parent_child_relationships,
     create_root_node,
-    create_vector_db,
+    create_vector_index,
+    delete_nodes,
+    drop_stale_relationships,
+    fetch_content_hashes,
     setup_graph,
+    write_nodes,
+)
+from src.neo4j_graph.graph_builder.utils.diff_manager import (
+    add_content_hashes,
+    diff_notices,
+    notice_id,
 )
-
 from src.neo4j_graph.graph_builder.utils.embed_manager import (
     get_embedding_model,
     truncate_docs_to_max_tokens,
 )
 from src.neo4j_graph.graph_builder.utils.notice_manager import load_notices
+from src.neo4j_graph.schema import create_schema
 from src.utils.logging import configure_logging
+from src.utils.timing import StageTimer
 
 configure_logging()
 logger = logging.getLogger(__name__)
@@ -31,31 +43,66 @@ if EMBEDDING_MODEL is None:
     raise ValueError("EMBEDDING_MODEL environment variable must be set.")
 
 
-def run_pipeline():
-    df = load_notices(NOTICES_PATH, COLUMNS_TO_KEEP)
-
-    df["text_to_embed"] = (
-        df["NAME"]
-        + "\n"
-        + df["Implementation_rule"].fillna("")
-        + "\n"
-        + df["Includes"].fillna("")
-        + "\n"
-        + df["IncludesAlso"].fillna("")
-    )
-
-    docs = DataFrameLoader(df, page_content_column="text_to_embed").load()
+def run_pipeline(incremental: bool = False):
+    timer = StageTimer()
 
-    docs = truncate_docs_to_max_tokens(docs, MAX_TOKENS)
+    with timer.stage("load"):
+        df = load_notices(NOTICES_PATH, COLUMNS_TO_KEEP)
+        docs = DataFrameLoader(df, page_content_column="text_to_embed").load()
 
-    emb_model = get_embedding_model(EMBEDDING_MODEL)
-    create_vector_db(docs, emb_model)
-
-    create_root_node()
+    with timer.stage("truncate"):
+        docs = truncate_docs_to_max_tokens(docs, MAX_TOKENS)
+        docs = add_content_hashes(docs)
 
     graph = setup_graph()
-    create_parent_child_relationships(graph)
+    existing = fetch_content_hashes(graph) if incremental else {}
+    diff = diff_notices(docs, existing) if existing else None
+    if diff is not None:
+        if diff.is_empty:
+            logger.info("✅ Graph already up to date")
+            return
+        by_id = {notice_id(doc): doc for doc in docs}
+        to_write = [by_id[node_id] for node_id in diff.upserted]
+        to_embed = [by_id[node_id] for node_id in diff.to_embed]
+    else:
+        if incremental:
+            logger.info("No hashed notices in the graph, falling back to a full build")
+        clean_graph()
+        to_write = to_embed = docs
+
+    # Label + constraints before the writes, so that every MERGE on ID is an index seek
+    create_schema(graph)
+
+    with timer.stage("embed"):
+        emb_model = get_embedding_model(EMBEDDING_MODEL)
+        vectors = emb_model.embed_documents([doc.page_content for doc in to_embed])
+
+    with timer.stage("write"):
+        write_nodes(graph, to_write, dict(zip(map(notice_id, to_embed), vectors)))
+        if vectors:
+            create_vector_index(graph, len(vectors[0]))
+        if diff is not None:
+            delete_nodes(graph, diff.removed)
+            drop_stale_relationships(graph, diff.changed)
+
+    with timer.stage("relationships"):
+        create_root_node()
+        create_parent_child_relationships(graph)
+        create_hierarchy(graph)
+
+    timer.report()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the NACE nomenclature graph in Neo4j")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only upsert / delete the notices that changed since the last build",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    args = parse_args()
+    run_pipeline(incremental=args.incremental)
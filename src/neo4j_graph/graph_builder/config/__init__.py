@@ -4,22 +4,36 @@ Graph builder configuration
 
 from .config import (
     COLUMNS_TO_KEEP,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CONCURRENCY,
+    EMBEDDING_MAX_RETRIES,
     EMBEDDING_MODEL,
     MAX_TOKENS,
+    NEO4J_CONFIG,
     NEO4J_PWD,
     NEO4J_URL,
     NEO4J_USERNAME,
+    NOTICES_CACHE_DIR,
     NOTICES_PATH,
     URL_EMBEDDING_API,
+    WRITE_BATCH_SIZE,
 )
 
 __all__ = [
     COLUMNS_TO_KEEP,
+    EMBEDDING_CACHE_PATH,
     EMBEDDING_MODEL,
     MAX_TOKENS,
     NOTICES_PATH,
+    NOTICES_CACHE_DIR,
     URL_EMBEDDING_API,
     NEO4J_URL,
     NEO4J_PWD,
     NEO4J_USERNAME,
+    NEO4J_CONFIG,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CONCURRENCY,
+    EMBEDDING_MAX_RETRIES,
+    WRITE_BATCH_SIZE,
 ]
@@ -2,20 +2,42 @@ import os
 
 from dotenv import load_dotenv
 
+from src.neo4j_graph.connection import Neo4JConfig
+
 load_dotenv(override=True)
 
 # EMBED MANAGER
 EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", None)
 MAX_TOKENS = int(os.environ.get("MAX_TOKENS", 32000))
 URL_EMBEDDING_API = "EMPTY"
+# Content-addressed cache of the notice embeddings, reused across builds (empty to disable)
+EMBEDDING_CACHE_PATH = os.environ.get(
+    "BUILD_EMBEDDING_CACHE_PATH", ".cache/build_embeddings.parquet"
+)
+
+# Parallel embedding of the notices: texts per request, concurrent requests, retries
+EMBEDDING_BATCH_SIZE = int(os.environ.get("BUILD_EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_CONCURRENCY = int(os.environ.get("BUILD_EMBEDDING_CONCURRENCY", 8))
+EMBEDDING_MAX_RETRIES = int(os.environ.get("BUILD_EMBEDDING_MAX_RETRIES", 5))
 
 # NEO4J DB MANAGER
 NEO4J_URL = "EMPTY"
 NEO4J_USERNAME = "EMPTY"
 NEO4J_PWD = "EMPTY"
+NEO4J_MAX_POOL_SIZE = int(os.environ.get("NEO4J_MAX_POOL_SIZE", 50))
+# Rows per UNWIND transaction when writing nodes and vectors
+WRITE_BATCH_SIZE = int(os.environ.get("NEO4J_WRITE_BATCH_SIZE", 1000))
+NEO4J_CONFIG = Neo4JConfig(
+    url=NEO4J_URL,
+    username=NEO4J_USERNAME,
+    password=NEO4J_PWD,
+    max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+)
 
 # NOTICE MANAGER
 NOTICES_PATH = "projet-ape/notices/Notices-NAF2025-FR.parquet"
+# Local copy of the notices, re-downloaded only when the S3 object changes (empty to disable)
+NOTICES_CACHE_DIR = os.environ.get("NOTICES_CACHE_DIR", ".cache/notices")
 COLUMNS_TO_KEEP = [
     "ID",
     "CODE",
@@ -1,41 +1,134 @@
 import logging
+from typing import Dict, List
 
-from langchain_neo4j import Neo4jGraph, Neo4jVector
-from neo4j import GraphDatabase
+from langchain_core.documents import Document
+from langchain_neo4j import Neo4jGraph
 
-from src.neo4j_graph.graph_builder.config import NEO4J_PWD, NEO4J_URL, NEO4J_USERNAME
+from src.neo4j_graph.connection import get_neo4j_graph
+from src.neo4j_graph.graph_builder.config import NEO4J_CONFIG, WRITE_BATCH_SIZE
+from src.neo4j_graph.graph_builder.utils.diff_manager import NodeHashes, notice_id
+from src.neo4j_graph.hierarchy import ROOT_CODE, preorder_intervals
+from src.neo4j_graph.schema import CODE_LABEL
 
 logger = logging.getLogger(__name__)
 
 
-def create_vector_db(docs, embedding_model, clean_previous: bool = True) -> Neo4jVector:
-    logger.info("Creating Neo4j vector DB with embeddings")
-
-    if clean_previous:
-        command = "DROP INDEX vector IF EXISTS"
+def clean_graph():
+    for command in ("DROP INDEX vector IF EXISTS", "MATCH (n) DETACH DELETE n"):
         logger.info("🧹 Cleaning previous vector DB. Running command " + command)
         execute_cypher_command(command)
 
-        command = "MATCH (n) DETACH DELETE n"
-        logger.info("🧹 Cleaning previous vector DB. Running command " + command)
-        execute_cypher_command(command)
 
-    return Neo4jVector.from_documents(
-        docs,
-        embedding_model,
-        url=NEO4J_URL,
-        username=NEO4J_USERNAME,
-        password=NEO4J_PWD,
-        ids=[f"{i}" for i in range(len(docs))],
+def write_nodes(
+    graph: Neo4jGraph,
+    docs: List[Document],
+    embeddings: Dict[str, List[float]],
+    batch_size: int = WRITE_BATCH_SIZE,
+) -> None:
+    """
+    Bulk upsert notice nodes with UNWIND batches, keyed on their notice ID.
+
+    Vectors are only (re)written for the docs present in `embeddings`, so metadata-only
+    changes keep the stored embedding.
+    """
+    rows = [
+        {
+            "id": notice_id(doc),
+            "text": doc.page_content,
+            "metadata": doc.metadata,
+            "embedding": embeddings.get(notice_id(doc)),
+        }
+        for doc in docs
+    ]
+    logger.info(f"✏️ Writing {len(rows)} nodes in batches of {batch_size}")
+    for start in range(0, len(rows), batch_size):
+        graph.query(
+            f"""
+        UNWIND $rows AS row
+        MERGE (node:{CODE_LABEL} {{ID: row.metadata.ID}})
+        ON CREATE SET node:Chunk
+        SET node.id = row.id, node.text = row.text, node += row.metadata
+        WITH node, row
+        WHERE row.embedding IS NOT NULL
+        CALL db.create.setNodeVectorProperty(node, 'embedding', row.embedding)
+        """,
+            params={"rows": rows[start : start + batch_size]},
+        )
+
+
+def create_vector_index(graph: Neo4jGraph, dimensions: int) -> None:
+    """Vector index on the chunk embeddings, as Neo4jVector would have created it."""
+    logger.info(f"📇 Creating vector index ({dimensions} dimensions) if missing")
+    graph.query(
+        f"""
+    CREATE VECTOR INDEX vector IF NOT EXISTS
+    FOR (node:Chunk) ON (node.embedding)
+    OPTIONS {{indexConfig: {{
+        `vector.dimensions`: {int(dimensions)},
+        `vector.similarity_function`: 'cosine'
+    }}}}
+    """
+    )
+    graph.query("CALL db.awaitIndexes()")
+
+
+def fetch_content_hashes(graph: Neo4jGraph) -> Dict[str, NodeHashes]:
+    """Content hashes of the notices currently in the graph, by notice ID."""
+    rows = graph.query(
+        f"""
+    MATCH (node:{CODE_LABEL})
+    WHERE node.ID IS NOT NULL
+    RETURN node.ID as id, node.CONTENT_HASH as content_hash, node.TEXT_HASH as text_hash
+    """
+    )
+    return {
+        str(row["id"]): NodeHashes(content_hash=row["content_hash"], text_hash=row["text_hash"])
+        for row in rows
+    }
+
+
+def delete_nodes(graph: Neo4jGraph, ids: List[str]) -> None:
+    if not ids:
+        return
+    logger.info(f"🗑️ Deleting {len(ids)} removed nodes")
+    graph.query(
+        f"""
+    MATCH (node:{CODE_LABEL})
+    WHERE toString(node.ID) IN $ids
+    DETACH DELETE node
+    """,
+        params={"ids": ids},
+    )
+
+
+def drop_stale_relationships(graph: Neo4jGraph, ids: List[str]) -> None:
+    """
+    Drop the HAS_CHILD edges of changed nodes that no longer match their PARENT_ID.
+
+    Missing edges are then restored by the (idempotent) root and relationship builds.
+    """
+    if not ids:
+        return
+    logger.info("✂️ Dropping stale HAS_CHILD relationships of changed nodes")
+    graph.query(
+        f"""
+    MATCH (parent:{CODE_LABEL})-[rel:HAS_CHILD]->(child:{CODE_LABEL})
+    WHERE toString(child.ID) IN $ids
+      AND NOT coalesce(parent.ID = child.PARENT_ID, false)
+      AND NOT (parent.CODE = 'root' AND child.LEVEL = 1)
+    DELETE rel
+    """,
+        params={"ids": ids},
     )
 
 
 def create_root_node():
     logger.info("Creating a root node")
-    command = """
-        MERGE (root {CODE: 'root', LEVEL: 0})
+    command = f"""
+        MERGE (root:{CODE_LABEL} {{CODE: 'root'}})
+        ON CREATE SET root.LEVEL = 0
         WITH root
-        MATCH (n WHERE n.LEVEL = 1)
+        MATCH (n:{CODE_LABEL} {{LEVEL: 1}})
         MERGE (root)-[:HAS_CHILD]->(n)
 
     """
@@ -45,34 +138,90 @@ def create_root_node():
 def create_parent_child_relationships(graph: Neo4jGraph):
     logger.info("🔁 Creating HAS_CHILD relationships")
     graph.query(
-        """
-    MATCH (child)
+        f"""
+    MATCH (child:{CODE_LABEL})
     WHERE child.PARENT_ID IS NOT NULL
-    MATCH (parent {ID: child.PARENT_ID})
+    MATCH (parent:{CODE_LABEL} {{ID: child.PARENT_ID}})
     MERGE (parent)-[:HAS_CHILD]->(child)
     """
     )
     logger.info("✅ Relationships created")
 
 
+def create_hierarchy(graph: Neo4jGraph, batch_size: int = WRITE_BATCH_SIZE) -> None:
+    """
+    Materialise the hierarchy on every node, from the HAS_CHILD edges:
+    ANCESTORS (codes from the top level down to the parent, root excluded), PATH, DEPTH
+    and the pre-order interval [PRE, POST] of the node's subtree.
+    """
+    logger.info("🌳 Materialising ancestors, depth and pre-order intervals")
+    rows = graph.query(
+        f"""
+    MATCH (node:{CODE_LABEL})
+    OPTIONAL MATCH (parent:{CODE_LABEL})-[:HAS_CHILD]->(node)
+    RETURN node.CODE as code, parent.CODE as parent
+    """
+    )
+    codes = sorted(row["code"] for row in rows)
+    index = {code: i for i, code in enumerate(codes)}
+    parents = [-1] * len(codes)
+    for row in rows:
+        if row["parent"] in index:
+            parents[index[row["code"]]] = index[row["parent"]]
+
+    children = [[] for _ in codes]
+    for i, parent in enumerate(parents):
+        if parent >= 0:
+            children[parent].append(i)
+    roots = [i for i, parent in enumerate(parents) if parent < 0]
+    pre, post, depth = preorder_intervals(children, roots)
+
+    ancestors = [[] for _ in codes]
+    for i in sorted(range(len(codes)), key=lambda j: pre[j]):
+        parent = parents[i]
+        if parent >= 0 and codes[parent] != ROOT_CODE:
+            ancestors[i] = ancestors[parent] + [codes[parent]]
+
+    unreachable = sum(p < 0 for p in pre)
+    if unreachable:
+        logger.warning(f"{unreachable} nodes are not reachable from a root")
+
+    updates = [
+        {
+            "code": code,
+            "ancestors": ancestors[i],
+            "path": "/".join(ancestors[i] + ([code] if code != ROOT_CODE else [])),
+            "depth": depth[i],
+            "pre": pre[i],
+            "post": post[i],
+        }
+        for i, code in enumerate(codes)
+    ]
+    for start in range(0, len(updates), batch_size):
+        graph.query(
+            f"""
+        UNWIND $rows AS row
+        MATCH (node:{CODE_LABEL} {{CODE: row.code}})
+        SET node.ANCESTORS = row.ancestors,
+            node.PATH = row.path,
+            node.DEPTH = row.depth,
+            node.PRE = row.pre,
+            node.POST = row.post
+        """,
+            params={"rows": updates[start : start + batch_size]},
+        )
+    logger.info(f"✅ Hierarchy materialised on {len(updates)} nodes")
+
+
 def setup_graph() -> Neo4jGraph:
     logger.info("🔗 Connecting to Neo4j graph DB")
-    return Neo4jGraph(
-        url=NEO4J_URL,
-        username=NEO4J_USERNAME,
-        password=NEO4J_PWD,
-        enhanced_schema=True,
-    )
+    return get_neo4j_graph(NEO4J_CONFIG)
 
 
 def execute_cypher_command(query, parameters=None):
-    driver = GraphDatabase.driver(NEO4J_URL, auth=(NEO4J_USERNAME, NEO4J_PWD))
+    # The pooled graph is shared by the whole build, its driver is closed at exit
     try:
-        with driver.session() as session:
-            result = session.run(query, parameters or {})
-            return result.data()  # Returns list of records
+        return get_neo4j_graph(NEO4J_CONFIG).query(query, parameters or {})
     except Exception as e:
         logging.error(f"Error executing Cypher query: {e}")
         raise
-    finally:
-        driver.close()
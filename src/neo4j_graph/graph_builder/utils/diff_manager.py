@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class NodeHashes(BaseModel):
+    content_hash: Optional[str] = None
+    text_hash: Optional[str] = None
+
+
+class NoticesDiff(BaseModel):
+    added: List[str] = []
+    changed: List[str] = []
+    # Subset of added + changed whose embedded text differs (the only ones to re-embed)
+    to_embed: List[str] = []
+    removed: List[str] = []
+    unchanged: int = 0
+
+    @property
+    def upserted(self) -> List[str]:
+        return self.added + self.changed
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+
+def notice_id(doc: Document) -> str:
+    """Stable node id of a notice (its ID column)."""
+    return str(doc.metadata["ID"])
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def add_content_hashes(docs: List[Document]) -> List[Document]:
+    """
+    Store TEXT_HASH (embedded text) and CONTENT_HASH (text + every metadata column) on docs.
+
+    Both are written on the nodes, so the next build can tell which notices changed and
+    which of them actually need a new embedding.
+    """
+    for doc in docs:
+        metadata = {k: v for k, v in doc.metadata.items() if k not in ("CONTENT_HASH", "TEXT_HASH")}
+        doc.metadata["TEXT_HASH"] = _sha256(doc.page_content)
+        doc.metadata["CONTENT_HASH"] = _sha256(
+            doc.page_content + "\x00" + json.dumps(metadata, sort_keys=True, default=str)
+        )
+    return docs
+
+
+def diff_notices(docs: List[Document], existing: Dict[str, NodeHashes]) -> NoticesDiff:
+    """Compare the new notices against the (ID -> hashes) currently stored in the graph."""
+    diff = NoticesDiff()
+    seen = set()
+    for doc in docs:
+        node_id = notice_id(doc)
+        seen.add(node_id)
+        previous = existing.get(node_id)
+        if previous is None:
+            diff.added.append(node_id)
+            diff.to_embed.append(node_id)
+        elif previous.content_hash != doc.metadata["CONTENT_HASH"]:
+            diff.changed.append(node_id)
+            if previous.text_hash != doc.metadata["TEXT_HASH"]:
+                diff.to_embed.append(node_id)
+        else:
+            diff.unchanged += 1
+
+    diff.removed = sorted(node_id for node_id in existing if node_id not in seen)
+    logger.info(
+        f"🔍 Notices diff: {len(diff.added)} added, {len(diff.changed)} changed "
+        f"({len(diff.to_embed)} to embed), {len(diff.removed)} removed, "
+        f"{diff.unchanged} unchanged"
+    )
+    return diff
@@ -1,37 +1,85 @@
 import logging
+import os
+from typing import Optional
 
-from langchain_text_splitters import TokenTextSplitter
+import numpy as np
+import tiktoken
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
-from src.neo4j_graph.graph_builder.config import URL_EMBEDDING_API
+from src.embeddings import CachedEmbeddings, EmbeddingCache, ParallelEmbeddings
+from src.embeddings.parquet_cache import ParquetEmbeddingCache
+from src.neo4j_graph.graph_builder.config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CONCURRENCY,
+    EMBEDDING_MAX_RETRIES,
+    URL_EMBEDDING_API,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def truncate_docs_to_max_tokens(docs, max_tokens):
-    splitter = TokenTextSplitter(chunk_size=max_tokens, chunk_overlap=0)
-    truncated_docs = []
+def truncate_docs_to_max_tokens(
+    docs, max_tokens, encoding_name: str = "gpt2", num_threads: Optional[int] = None
+):
+    """
+    Truncate documents to their first `max_tokens` tokens.
 
-    for doc in docs:
-        original_text = doc.page_content
-        chunks = splitter.split_text(original_text)
+    Every text is tokenized once, in bulk (tiktoken encode_batch, spread over threads), and
+    only the documents over the limit are decoded back. Same tokenizer and result as the
+    first chunk of a TokenTextSplitter(chunk_size=max_tokens).
+    """
+    encoding = tiktoken.get_encoding(encoding_name)
+    tokens = encoding.encode_batch(
+        [doc.page_content for doc in docs], num_threads=num_threads or os.cpu_count() or 1
+    )
 
-        if len(chunks) > 1:
+    lengths = np.array([len(ids) for ids in tokens])
+    truncated = 0
+    for doc, ids in zip(docs, tokens):
+        if len(ids) > max_tokens:
             logger.warning(f"Document truncated to {max_tokens} tokens. Metadata: {doc.metadata}")
+            doc.page_content = encoding.decode(ids[:max_tokens])
+            truncated += 1
 
-        doc.page_content = chunks[0]
-        truncated_docs.append(doc)
-
-    return truncated_docs
+    if len(lengths):
+        p50, p90, p99 = np.percentile(lengths, [50, 90, 99])
+        logger.info(
+            f"✂️ {truncated}/{len(docs)} documents truncated to {max_tokens} tokens. "
+            f"Token lengths: min={lengths.min()} p50={p50:.0f} p90={p90:.0f} "
+            f"p99={p99:.0f} max={lengths.max()}"
+        )
+    return docs
 
 
 # TODO: Remove langchain depency
 # TODO: factorize embedder manager outside from the graph builder ?
-def get_embedding_model(model_name: str) -> OpenAIEmbeddings:
-    """Initialize the embedding model."""
-    return OpenAIEmbeddings(
-        model=model_name,
-        openai_api_base=URL_EMBEDDING_API,
-        openai_api_key="EMPTY",
-        tiktoken_enabled=False,
+def get_embedding_model(
+    model_name: str, cache_path: Optional[str] = EMBEDDING_CACHE_PATH
+) -> Embeddings:
+    """
+    Initialize the embedding model: batched concurrent requests with retries, behind the
+    build embedding cache if a path is given.
+    """
+    model = ParallelEmbeddings(
+        OpenAIEmbeddings(
+            model=model_name,
+            openai_api_base=URL_EMBEDDING_API,
+            openai_api_key="EMPTY",
+            tiktoken_enabled=False,
+        ),
+        batch_size=EMBEDDING_BATCH_SIZE,
+        max_concurrency=EMBEDDING_CONCURRENCY,
+        max_retries=EMBEDDING_MAX_RETRIES,
     )
+    if not cache_path:
+        return model
+    try:
+        cache = ParquetEmbeddingCache(cache_path)
+    except ImportError:
+        # pyarrow is optional: same keys, in a SQLite store next to the Parquet path
+        sqlite_path = f"{os.path.splitext(cache_path)[0]}.sqlite"
+        logger.warning(f"pyarrow is not installed, build embeddings are cached in {sqlite_path}")
+        cache = EmbeddingCache(sqlite_path, normalize=False)
+    return CachedEmbeddings(model, model=model_name, cache=cache)
@@ -1,11 +1,25 @@
+import json
 import logging
 import os
+from typing import List, Optional
 
 import pandas as pd
 import s3fs
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+from src.neo4j_graph.graph_builder.config import NOTICES_CACHE_DIR
+
 logger = logging.getLogger(__name__)
 
+# Columns concatenated (in this order, one per line) into the text that gets embedded
+TEXT_TO_EMBED_COLUMNS = ["NAME", "Implementation_rule", "Includes", "IncludesAlso"]
+
 
 def get_file_system(token=None) -> s3fs.S3FileSystem:
     """
@@ -37,8 +51,70 @@ def get_file_system(token=None) -> s3fs.S3FileSystem:
     return s3fs.S3FileSystem(**options)
 
 
-def load_notices(parquet_path: str, columns: list) -> pd.DataFrame:
+def fetch_notices(parquet_path: str, fs: s3fs.S3FileSystem, cache_dir: str) -> str:
+    """
+    Return a local copy of the notices parquet, downloading it only when the S3 object
+    changed (ETag / size recorded in a sidecar file next to the local copy).
+    """
+    local_path = os.path.join(cache_dir, os.path.basename(parquet_path))
+    meta_path = f"{local_path}.meta.json"
+
+    try:
+        info = fs.info(parquet_path)
+    except Exception as e:
+        if os.path.exists(local_path):
+            logger.warning(f"Cannot reach {parquet_path} ({e}), using cached copy")
+            return local_path
+        raise
+
+    remote = {"path": parquet_path, "etag": info.get("ETag"), "size": info.get("size")}
+    if os.path.exists(local_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == remote and os.path.getsize(local_path) == remote["size"]:
+                logger.info(f"📦 Notices unchanged on S3, reading cached copy {local_path}")
+                return local_path
+
+    logger.info(f"⬇️ Downloading {parquet_path} to {local_path}")
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{local_path}.tmp"
+    fs.get(parquet_path, tmp_path)
+    os.replace(tmp_path, local_path)
+    with open(meta_path, "w") as f:
+        json.dump(remote, f)
+    return local_path
+
+
+def load_notices(
+    parquet_path: str, columns: List[str], cache_dir: Optional[str] = NOTICES_CACHE_DIR
+) -> pd.DataFrame:
+    """
+    Load the notices (only `columns` are read from the parquet) with their `text_to_embed`.
+
+    The S3 object is cached on local disk when `cache_dir` is set.
+    """
     logger.info("Loading Parquet data from: %s", parquet_path)
     fs = get_file_system()
-    df = pd.read_parquet(parquet_path, filesystem=fs)
-    return df[columns]
+    if cache_dir:
+        source, filesystem = fetch_notices(parquet_path, fs, cache_dir), None
+    else:
+        source, filesystem = parquet_path, fs
+
+    if pq is None:
+        df = pd.read_parquet(source, columns=columns, filesystem=filesystem)
+        df["text_to_embed"] = _text_to_embed_pandas(df)
+        return df
+
+    # Arrow path: the text is concatenated column-wise before the single conversion to pandas
+    table = pq.read_table(source, columns=columns, filesystem=filesystem)
+    parts = [table.column(column).cast(pa.large_string()) for column in TEXT_TO_EMBED_COLUMNS]
+    parts = parts[:1] + [pc.fill_null(part, "") for part in parts[1:]]
+    separator = pa.scalar("\n", pa.large_string())
+    table = table.append_column("text_to_embed", pc.binary_join_element_wise(*parts, separator))
+    return table.to_pandas()
+
+
+def _text_to_embed_pandas(df: pd.DataFrame) -> pd.Series:
+    text = df[TEXT_TO_EMBED_COLUMNS[0]]
+    for column in TEXT_TO_EMBED_COLUMNS[1:]:
+        text = text + "\n" + df[column].fillna("")
+    return text
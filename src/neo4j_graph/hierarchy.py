@@ -0,0 +1,33 @@
+from typing import List, Sequence, Tuple
+
+# Code of the synthetic root node, left out of the materialised ancestor lists
+ROOT_CODE = "root"
+
+
+def preorder_intervals(
+    children: Sequence[Sequence[int]], roots: Sequence[int]
+) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Pre-order numbering of a forest given as children index lists (in visiting order).
+
+    Returns (pre, post, depth) per node, where `post` is the largest `pre` of the node's
+    subtree: j is a strict descendant of i iff pre[i] < pre[j] <= post[i]. Nodes not
+    reachable from `roots` keep pre = post = -1.
+    """
+    pre = [-1] * len(children)
+    post = [-1] * len(children)
+    depth = [0] * len(children)
+    counter = 0
+
+    stack = [(root, 0, False) for root in reversed(roots)]
+    while stack:
+        i, d, exiting = stack.pop()
+        if exiting:
+            post[i] = counter - 1
+            continue
+        pre[i], depth[i] = counter, d
+        counter += 1
+        stack.append((i, d, True))
+        stack.extend((j, d + 1, False) for j in reversed(children[i]))
+
+    return pre, post, depth
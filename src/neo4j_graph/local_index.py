@@ -0,0 +1,183 @@
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_neo4j import Neo4jGraph
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_QUERY = """
+MATCH (node:Code)
+WHERE node.embedding IS NOT NULL
+RETURN node.CODE as code,
+       node.LEVEL as level,
+       coalesce(node.FINAL, 0) = 1 as final,
+       coalesce(node.PRE, -1) as pre,
+       node.embedding as embedding
+ORDER BY pre, code
+"""
+
+# Pre-order interval (PRE, POST] of a subtree, as materialised by the graph builder
+Interval = Tuple[int, int]
+
+
+class LocalVectorIndex:
+    """
+    Exact cosine index held in RAM, as an alternative to the Neo4j vector index.
+
+    Embeddings are L2-normalised once and stored as one contiguous (n, d) matrix, so a
+    top-k query is a single matrix-vector product. Scores follow the Neo4j cosine
+    convention, (1 + cos) / 2, so both retrievers return the same codes and scores.
+
+    The FINAL rows are also kept as their own contiguous float32 matrix, built once, which
+    the default FINAL-only searches score without any copy. Rows are sorted by pre-order
+    number: the nodes of a subtree are a contiguous slice, so a subtree-restricted search
+    only scores views of that slice.
+    """
+
+    def __init__(
+        self,
+        codes: Sequence[str],
+        embeddings: np.ndarray,
+        dtype=np.float32,
+        levels: Optional[Sequence[int]] = None,
+        final: Optional[Sequence[bool]] = None,
+        pre: Optional[Sequence[int]] = None,
+    ):
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        # float16 halves the memory footprint; scores are always computed in float32
+        self.matrix = np.ascontiguousarray(matrix / norms, dtype=dtype)
+        self.codes = list(codes)
+
+        n = len(self.codes)
+        self.levels = np.asarray(levels if levels is not None else [0] * n, dtype=np.int64)
+        self.final = np.asarray(final if final is not None else [True] * n, dtype=bool)
+        self.pre = np.asarray(pre if pre is not None else range(n), dtype=np.int64)
+        self._rows = {code: i for i, code in enumerate(self.codes)}
+        self._all_rows = np.arange(n)
+        self._final_rows = np.flatnonzero(self.final)
+        self._final_pre = self.pre[self._final_rows]
+        self._final_matrix = np.ascontiguousarray(self.matrix[self._final_rows], dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @classmethod
+    def from_graph(cls, graph: Neo4jGraph, dtype=np.float32) -> "LocalVectorIndex":
+        """Load all node embeddings (every level) in one query."""
+        rows = graph.query(EMBEDDINGS_QUERY)
+        index = cls(
+            [row["code"] for row in rows],
+            np.array([row["embedding"] for row in rows], dtype=np.float32),
+            dtype=dtype,
+            levels=[row["level"] or 0 for row in rows],
+            final=[row["final"] for row in rows],
+            pre=[row["pre"] for row in rows],
+        )
+        logger.info(
+            f"Local vector index loaded with {len(rows)} codes ({len(index._final_rows)} FINAL)"
+        )
+        return index
+
+    @staticmethod
+    def _scores(queries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        cosine = (queries / norms) @ matrix.astype(np.float32, copy=False).T
+        return np.clip((1.0 + cosine) / 2.0, 0.0, 1.0)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return np.empty((scores.shape[0], 0), dtype=np.int64)
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(candidates, order, axis=1)
+
+    def _blocks(
+        self, final_only: bool, level: Optional[int], subtrees: Optional[Sequence[Interval]]
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(matrix, rows) slices to score: views of a contiguous matrix, never gathered copies."""
+        if level is None and final_only:
+            matrix, rows, pre = self._final_matrix, self._final_rows, self._final_pre
+        else:
+            matrix, rows, pre = self.matrix, self._all_rows, self.pre
+        if subtrees is None:
+            return [(matrix, rows)]
+
+        # Subtree (PRE, POST] = contiguous slice of the pre-order sorted rows; overlapping
+        # subtrees are merged so that no row is scored twice
+        spans = sorted(
+            (
+                int(np.searchsorted(pre, low, side="right")),
+                int(np.searchsorted(pre, high, side="right")),
+            )
+            for low, high in subtrees
+        )
+        merged: List[List[int]] = []
+        for start, end in spans:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            elif end > start:
+                merged.append([start, end])
+        return [(matrix[start:end], rows[start:end]) for start, end in merged]
+
+    def _search_scores(
+        self,
+        queries: np.ndarray,
+        final_only: bool = True,
+        level: Optional[int] = None,
+        subtrees: Optional[Sequence[Interval]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Scores (one line per query) of the rows matching the filters, and those rows."""
+        blocks = self._blocks(final_only, level, subtrees)
+        if not blocks:
+            return np.empty((len(np.atleast_2d(queries)), 0), dtype=np.float32), self._all_rows[:0]
+        scores = np.concatenate([self._scores(queries, matrix) for matrix, _ in blocks], axis=1)
+        rows = np.concatenate([block_rows for _, block_rows in blocks])
+
+        # Level filter: the slices were scored in place, only their scores are filtered
+        if level is not None:
+            keep = self.levels[rows] == level
+            scores, rows = scores[:, keep], rows[keep]
+        return scores, rows
+
+    def search(
+        self,
+        embedding: Sequence[float],
+        k: int = 5,
+        final_only: bool = True,
+        level: Optional[int] = None,
+        subtrees: Optional[Sequence[Interval]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top-k codes among the rows matching the filters (FINAL codes by default)."""
+        scores, rows = self._search_scores(embedding, final_only, level, subtrees)
+        if len(rows) == 0:
+            return []
+        top = self._top_k(scores, k)[0]
+        return [(self.codes[rows[j]], float(scores[0, j])) for j in top]
+
+    def score_codes(self, embedding: Sequence[float], codes: Sequence[str]) -> Dict[str, float]:
+        """Similarity of the given codes to the query vector (codes without embedding left out)."""
+        rows = np.array([self._rows[code] for code in codes if code in self._rows], dtype=np.int64)
+        if len(rows) == 0:
+            return {}
+        # A few children at a time: gathering their rows is cheap
+        scores = self._scores(embedding, self.matrix[rows])[0]
+        return {self.codes[row]: float(score) for row, score in zip(rows, scores)}
+
+    def search_batch(
+        self, embeddings: Sequence[Sequence[float]], k: int = 5
+    ) -> List[List[Tuple[str, float]]]:
+        """Top-k FINAL codes and scores for many query vectors with one matrix product."""
+        rows = self._final_rows
+        scores = self._scores(np.asarray(embeddings, dtype=np.float32), self._final_matrix)
+        top = self._top_k(scores, k)
+        return [
+            [(self.codes[rows[j]], float(row_scores[j])) for j in row_top]
+            for row_scores, row_top in zip(scores, top)
+        ]
@@ -0,0 +1,54 @@
+import logging
+
+from langchain_neo4j import Neo4jGraph
+
+logger = logging.getLogger(__name__)
+
+# Label carried by every nomenclature node (the embedded chunks and the root)
+CODE_LABEL = "Code"
+
+# The root was created without a label by the builders that predate :Code
+LABEL_CHUNKS_QUERY = f"""
+MATCH (node)
+WHERE (node:Chunk AND node.CODE IS NOT NULL) OR node.CODE = 'root'
+SET node:{CODE_LABEL}
+"""
+
+SCHEMA_QUERIES = (
+    f"CREATE CONSTRAINT code_code IF NOT EXISTS FOR (n:{CODE_LABEL}) REQUIRE n.CODE IS UNIQUE",
+    f"CREATE CONSTRAINT code_id IF NOT EXISTS FOR (n:{CODE_LABEL}) REQUIRE n.ID IS UNIQUE",
+    f"CREATE INDEX code_level IF NOT EXISTS FOR (n:{CODE_LABEL}) ON (n.LEVEL)",
+    f"CREATE INDEX code_final IF NOT EXISTS FOR (n:{CODE_LABEL}) ON (n.FINAL)",
+    # Pre-order number: subtree and "is X under Y" queries are range seeks on it
+    f"CREATE INDEX code_pre IF NOT EXISTS FOR (n:{CODE_LABEL}) ON (n.PRE)",
+    # Keyword search on labels and notes (the French analyzer folds accents and plurals)
+    f"CREATE FULLTEXT INDEX code_search IF NOT EXISTS FOR (n:{CODE_LABEL}) "
+    "ON EACH [n.NAME, n.text] OPTIONS {indexConfig: {`fulltext.analyzer`: 'french'}}",
+)
+
+
+def create_schema(graph: Neo4jGraph) -> None:
+    """
+    Label the nomenclature nodes and create their constraints and indexes.
+
+    Idempotent: it can be run on a freshly built graph as well as on a graph built
+    before the label existed, to migrate it without re-embedding.
+    """
+    logger.info(f"🏷️ Labelling nomenclature nodes as :{CODE_LABEL}")
+    graph.query(LABEL_CHUNKS_QUERY)
+
+    for query in SCHEMA_QUERIES:
+        logger.info(f"📇 Running: {query}")
+        graph.query(query)
+    graph.query("CALL db.awaitIndexes()")
+    logger.info("✅ Schema created")
+
+
+if __name__ == "__main__":
+    # Migration of a graph built by an earlier version, without re-embedding: labels and
+    # indexes, then the ANCESTORS / DEPTH / PRE / POST properties the lookups rely on
+    from src.neo4j_graph.graph_builder.utils.db_manager import create_hierarchy, setup_graph
+
+    graph = setup_graph()
+    create_schema(graph)
+    create_hierarchy(graph)
@@ -0,0 +1,281 @@
+import gzip
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_neo4j import Neo4jGraph
+
+from .hierarchy import ROOT_CODE, preorder_intervals
+from .text_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+FrozenDict = Tuple[Tuple[str, Any], ...]
+
+# Properties kept for each node, in the order they are stored in a record
+FIELDS = (
+    "code",
+    "level",
+    "final",
+    "name",
+    "description",
+    "includes",
+    "includes_also",
+    "excludes",
+    "implementation_rule",
+)
+_F = {field: i for i, field in enumerate(FIELDS)}
+
+NODES_QUERY = """
+MATCH (node:Code)
+RETURN node.CODE as code,
+       node.LEVEL as level,
+       node.FINAL as final,
+       node.NAME as name,
+       node.text as description,
+       node.Includes as includes,
+       node.IncludesAlso as includes_also,
+       node.Excludes as excludes,
+       node.Implementation_rule as implementation_rule
+"""
+
+EDGES_QUERY = """
+MATCH (parent:Code)-[:HAS_CHILD]->(child:Code)
+RETURN parent.CODE as parent, child.CODE as child
+"""
+
+# Projections returned by the navigation lookups (same keys as the Cypher queries of Graph)
+CHILD_KEYS = ("code", "level", "final", "name", "description", "includes", "excludes")
+NODE_KEYS = ("code", "level", "name", "description", "includes", "excludes")
+PARENT_KEYS = ("code", "level", "name", "description")
+INFO_KEYS = (
+    "code",
+    "level",
+    "name",
+    "description",
+    "includes",
+    "includes_also",
+    "excludes",
+    "implementation_rule",
+)
+SEARCH_LIMIT = 20
+
+
+class NomenclatureSnapshot:
+    """
+    In-memory copy of the nomenclature tree.
+
+    Nodes are stored as records (tuples ordered like FIELDS) addressed by an integer
+    index; the hierarchy is kept as a parent index array and a children index array,
+    so that parent / children / siblings lookups are O(1) dictionary and list accesses.
+    """
+
+    def __init__(self, version: str, records: List[tuple], parents: List[int]):
+        self.version = version
+        self.records = records
+        self.parents = parents
+        self.index: Dict[str, int] = {record[_F["code"]]: i for i, record in enumerate(records)}
+
+        self.children: List[List[int]] = [[] for _ in records]
+        for i, parent in enumerate(parents):
+            if parent >= 0:
+                self.children[parent].append(i)
+        for child_list in self.children:
+            child_list.sort(key=lambda j: self.records[j][_F["code"]])
+
+        # Pre-order intervals: the subtree of i is order[pre[i] + 1 : post[i] + 1]
+        roots = [i for i, parent in enumerate(parents) if parent < 0]
+        self.pre, self.post, self.depth = preorder_intervals(
+            self.children, self._sorted_by_code(roots)
+        )
+        self.order = [i for _, i in sorted((p, i) for i, p in enumerate(self.pre) if p >= 0)]
+
+        self._text_index: Optional[BM25Index] = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    # ------------------------------------------------------------------
+    # Build / persistence
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_graph(cls, graph: Neo4jGraph, version: str) -> "NomenclatureSnapshot":
+        """Dump all nodes and HAS_CHILD edges from Neo4j (two queries)."""
+        logger.info(f"Loading nomenclature snapshot {version} from Neo4j")
+        nodes = graph.query(NODES_QUERY)
+        edges = graph.query(EDGES_QUERY)
+
+        records = [tuple(node[field] for field in FIELDS) for node in nodes]
+        index = {record[_F["code"]]: i for i, record in enumerate(records)}
+        parents = [-1] * len(records)
+        for edge in edges:
+            child, parent = index.get(edge["child"]), index.get(edge["parent"])
+            if child is not None and parent is not None:
+                parents[child] = parent
+
+        logger.info(f"Snapshot loaded: {len(records)} nodes, {len(edges)} edges")
+        return cls(version, records, parents)
+
+    @classmethod
+    def load(cls, path: str) -> "NomenclatureSnapshot":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+
+        if tuple(payload["fields"]) != FIELDS:
+            raise ValueError(f"Snapshot {path} was written with another set of fields")
+
+        logger.info(f"Snapshot {payload['version']} loaded from {path}")
+        return cls(payload["version"], [tuple(r) for r in payload["records"]], payload["parents"])
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        payload = {
+            "version": self.version,
+            "fields": FIELDS,
+            "records": self.records,
+            "parents": self.parents,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        logger.info(f"Snapshot {self.version} saved to {path}")
+
+    @classmethod
+    def load_or_build(
+        cls, graph: Neo4jGraph, version: str, path: Optional[str] = None
+    ) -> "NomenclatureSnapshot":
+        """Warm start from `path` if it holds this version, otherwise dump Neo4j (and save)."""
+        if path and os.path.exists(path):
+            snapshot = cls.load(path)
+            if snapshot.version == version:
+                return snapshot
+            logger.warning(f"Snapshot {path} is for {snapshot.version}, expected {version}")
+
+        snapshot = cls.from_graph(graph, version)
+        if path:
+            snapshot.save(path)
+        return snapshot
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _project(self, i: int, keys: Tuple[str, ...]) -> FrozenDict:
+        record = self.records[i]
+        return tuple((key, record[_F[key]]) for key in keys)
+
+    def _sorted_by_code(self, indices) -> List[int]:
+        return sorted(indices, key=lambda j: self.records[j][_F["code"]])
+
+    # ------------------------------------------------------------------
+    # Lookups (same frozen shapes as the Graph._cached_* methods)
+    # ------------------------------------------------------------------
+
+    def get_code_information(self, code: str) -> FrozenDict:
+        i = self.index.get(code)
+        if i is None:
+            return ()
+
+        parent = self.parents[i]
+        children = [
+            {"code": self.records[j][_F["code"]], "name": self.records[j][_F["name"]]}
+            for j in self.children[i]
+        ]
+        return self._project(i, INFO_KEYS) + (
+            ("parent_code", self.records[parent][_F["code"]] if parent >= 0 else None),
+            ("children", children),
+            ("children_count", len(children)),
+        )
+
+    def get_codes_information(self, codes: List[str]) -> Tuple[FrozenDict, ...]:
+        """get_code_information of several codes, in the given order (unknown codes skipped)."""
+        return tuple(info for info in map(self.get_code_information, codes) if info)
+
+    def expand_node(self, code: str) -> FrozenDict:
+        """The node, its parent and its children (with their notes) in one record."""
+        i = self.index.get(code)
+        if i is None:
+            return ()
+
+        parent = self.parents[i]
+        return self._project(i, INFO_KEYS) + (
+            ("parent", dict(self._project(parent, PARENT_KEYS)) if parent >= 0 else None),
+            ("children", [dict(self._project(j, CHILD_KEYS)) for j in self.children[i]]),
+            ("siblings_count", len(self.children[parent]) - 1 if parent >= 0 else 0),
+        )
+
+    def get_children(self, code: str) -> Tuple[FrozenDict, ...]:
+        i = self.index.get(code)
+        if i is None:
+            return ()
+        return tuple(self._project(j, CHILD_KEYS) for j in self.children[i])
+
+    def get_descendants(self, code: str, levels: int) -> Tuple[FrozenDict, ...]:
+        """Nodes at most `levels` hops below `code` (slice of the pre-order)."""
+        i = self.index.get(code)
+        if i is None or self.pre[i] < 0:
+            return ()
+
+        max_depth = self.depth[i] + levels
+        subtree = self.order[self.pre[i] + 1 : self.post[i] + 1]
+        descendants = [j for j in subtree if self.depth[j] <= max_depth]
+        return tuple(self._project(j, NODE_KEYS) for j in self._sorted_by_code(descendants))
+
+    def get_ancestors(self, code: str) -> Tuple[FrozenDict, ...]:
+        """Ancestors from the top level down to the parent (synthetic root excluded)."""
+        i = self.index.get(code)
+        if i is None:
+            return ()
+
+        ancestors = []
+        parent = self.parents[i]
+        while parent >= 0 and self.records[parent][_F["code"]] != ROOT_CODE:
+            ancestors.append(parent)
+            parent = self.parents[parent]
+        return tuple(self._project(j, PARENT_KEYS) for j in reversed(ancestors))
+
+    def get_interval(self, code: str) -> Tuple[int, ...]:
+        """Pre-order interval (PRE, POST) of the subtree of `code`, () if unknown."""
+        i = self.index.get(code)
+        if i is None or self.pre[i] < 0:
+            return ()
+        return (self.pre[i], self.post[i])
+
+    def is_under(self, code: str, ancestor: str) -> bool:
+        """True if `code` is a strict descendant of `ancestor`."""
+        i, a = self.index.get(code), self.index.get(ancestor)
+        if i is None or a is None or self.pre[a] < 0:
+            return False
+        return self.pre[a] < self.pre[i] <= self.post[a]
+
+    def get_siblings(self, code: str) -> Tuple[FrozenDict, ...]:
+        i = self.index.get(code)
+        if i is None or self.parents[i] < 0:
+            return ()
+        return tuple(self._project(j, NODE_KEYS) for j in self.children[self.parents[i]] if j != i)
+
+    def get_parent(self, code: str) -> FrozenDict:
+        i = self.index.get(code)
+        if i is None or self.parents[i] < 0:
+            return ()
+        return self._project(self.parents[i], PARENT_KEYS)
+
+    def search_codes(
+        self, search_term: str, limit: int = SEARCH_LIMIT, final_only: bool = False
+    ) -> Tuple[FrozenDict, ...]:
+        """BM25 keyword search over names (weighted twice) and descriptions, best first."""
+        if self._text_index is None:
+            self._text_index = BM25Index(
+                [
+                    f"{r[_F['name']] or ''} {r[_F['name']] or ''} {r[_F['description']] or ''}"
+                    for r in self.records
+                ]
+            )
+        matches = self._text_index.search(search_term, limit=None)
+        if final_only:
+            matches = [(j, score) for j, score in matches if self.records[j][_F["final"]] == 1]
+        return tuple(
+            self._project(j, PARENT_KEYS) + (("score", round(score, 4)),)
+            for j, score in matches[:limit]
+        )
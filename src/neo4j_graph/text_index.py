@@ -0,0 +1,84 @@
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+# Frequent French words (accent-folded) that carry no meaning for a code search
+STOPWORDS = frozenset(
+    """
+    a au aux avec ce ces d dans de des du en et l la le les leur leurs n ne ni non ou par
+    pas pour qu que qui s sa sans se ses son sont sur un une y autre autres etc hors
+    """.split()
+)
+
+
+def fold(text: str) -> str:
+    """Lower-case and strip accents ("Crèmerie" -> "cremerie")."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """Accent-folded word tokens, without stopwords, with a light plural stemming."""
+    tokens = []
+    for token in _TOKEN.findall(fold(text)):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token[-1] in "sx":
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def to_lucene_query(text: str) -> str:
+    """Escape a free-text search so that Lucene reads it as plain terms (OR-ed)."""
+    # Lower-casing also keeps AND / OR / NOT from being read as operators
+    return " ".join(_LUCENE_SPECIAL.sub(r"\\\1", term) for term in text.lower().split())
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring.
+
+    Built once over a list of documents (any text), queried with free text; used for
+    keyword search over the nomenclature labels when the graph is held in memory.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+        lengths = []
+        for i, document in enumerate(documents):
+            tokens = tokenize(document or "")
+            lengths.append(len(tokens))
+            for token, count in Counter(tokens).items():
+                self.postings[token].append((i, count))
+
+        n = len(documents)
+        average_length = (sum(lengths) / n) if n else 0.0
+        self.idf = {
+            token: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self.postings.items()
+        }
+        # Length normalisation of each document, precomputed once
+        self.norms = [
+            k1 * (1 - b + b * length / average_length) if average_length else k1
+            for length in lengths
+        ]
+
+    def search(self, query: str, limit: Optional[int] = 20) -> List[Tuple[int, float]]:
+        """(document index, score) pairs, best first (all matches if limit is None)."""
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(tokenize(query)):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for i, count in self.postings[token]:
+                scores[i] += idf * count * (self.k1 + 1) / (count + self.norms[i])
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
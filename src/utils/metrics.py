@@ -0,0 +1,311 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Number of run summaries kept in memory
+MAX_RUNS = int(os.environ.get("METRICS_MAX_RUNS", 1000))
+
+METRIC_PREFIX = "graal"
+
+
+class SpanStats(BaseModel):
+    count: int = 0
+    seconds: float = 0.0
+
+
+class RunSummary(BaseModel):
+    """Time, spans and counters (LLM turns, tokens, queries, cache hits) of one run."""
+
+    run_id: str
+    name: str
+    started_at: float
+    seconds: float = 0.0
+    error: Optional[str] = None
+    spans: Dict[str, SpanStats] = {}
+    counters: Dict[str, float] = {}
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as exposed by Prometheus."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf above the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+# Run being executed in the current asyncio task (inherited by tools and pool threads)
+_current_run: ContextVar[Optional[RunSummary]] = ContextVar("metrics_run", default=None)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _number(value: float) -> str:
+    """Exact text of a sample value (integers without exponent, floats in full precision)."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, latency histograms and per-run summaries. Thread-safe.
+
+    Spans time a block of code: their duration goes to the `span_seconds` histogram and
+    to the summary of the current run. Counters are also added to the current run.
+    """
+
+    def __init__(self, max_runs: int = MAX_RUNS):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.runs: deque = deque(maxlen=max_runs)
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        run = _current_run.get()
+        with self._lock:
+            self.counters[(name, _labels(labels))] += value
+            if run is not None:
+                run.counters[name] = run.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe("span_seconds", seconds, span=name)
+            run = _current_run.get()
+            if run is not None:
+                with self._lock:
+                    stats = run.spans.setdefault(name, SpanStats())
+                    stats.count += 1
+                    stats.seconds += seconds
+
+    @contextmanager
+    def run(self, name: str):
+        """
+        Summary of one run (e.g. a classification). Nested runs are merged into the
+        outer one, so that an agent called by a classifier counts in the classifier run.
+        """
+        if _current_run.get() is not None:
+            yield _current_run.get()
+            return
+
+        summary = RunSummary(run_id=uuid.uuid4().hex, name=name, started_at=time.time())
+        token = _current_run.set(summary)
+        start = time.perf_counter()
+        try:
+            yield summary
+        except BaseException as e:
+            summary.error = type(e).__name__
+            raise
+        finally:
+            _current_run.reset(token)
+            summary.seconds = time.perf_counter() - start
+            self.observe("run_seconds", summary.seconds, run=name)
+            self.count("runs", run=name, status="error" if summary.error else "ok")
+            with self._lock:
+                self.runs.append(summary)
+            logger.debug(f"Run summary: {summary.model_dump_json()}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.runs.clear()
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                    for (name, labels), histogram in sorted(
+                        self.histograms.items(), key=lambda item: item[0]
+                    )
+                ],
+                "runs": [run.model_dump() for run in self.runs],
+            }
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Counters and histograms in the Prometheus text exposition format."""
+
+        def fmt(labels: Labels, extra: Labels = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            escaped = (
+                (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                for key, value in pairs
+            )
+            return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            by_name: Dict[str, list] = defaultdict(list)
+            for (name, labels), value in sorted(self.counters.items()):
+                by_name[name].append((labels, value))
+            for name, series in by_name.items():
+                metric = f"{METRIC_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines += [f"{metric}{fmt(labels)} {_number(value)}" for labels, value in series]
+
+            by_name = defaultdict(list)
+            for (name, labels), histogram in sorted(
+                self.histograms.items(), key=lambda item: item[0]
+            ):
+                by_name[name].append((labels, histogram))
+            for name, series in by_name.items():
+                metric = f"{METRIC_PREFIX}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in series:
+                    cumulative = 0
+                    bounds = [f"{b:g}" for b in histogram.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{fmt(labels, (('le', bound),))} {cumulative}")
+                    lines.append(f"{metric}_sum{fmt(labels)} {_number(histogram.sum)}")
+                    lines.append(f"{metric}_count{fmt(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """Write the metrics to `path`: Prometheus text for a .prom file, else JSON."""
+        content = self.to_prometheus() if path.endswith(".prom") else self.to_json(indent=2)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        logger.info(f"Metrics written to {path}")
+
+    def report(self) -> str:
+        """Latency quantiles per span and counter totals, for the logs."""
+        lines = ["Spans (count, mean, p50, p95, p99):"]
+        with self._lock:
+            for (name, labels), histogram in sorted(
+                self.histograms.items(), key=lambda item: -item[1].sum
+            ):
+                label = ",".join(value for _, value in labels) or name
+                mean = histogram.sum / histogram.count if histogram.count else 0.0
+                lines.append(
+                    f"  {label:<45} {histogram.count:6d}  {mean:8.3f}s  "
+                    f"{histogram.quantile(0.5):g}s  {histogram.quantile(0.95):g}s  "
+                    f"{histogram.quantile(0.99):g}s"
+                )
+            totals: Dict[str, float] = defaultdict(float)
+            for (name, _), value in self.counters.items():
+                totals[name] += value
+        lines.append("Counters:")
+        lines += [f"  {name:<45} {_number(value)}" for name, value in sorted(totals.items())]
+        report = "\n".join(lines)
+        logger.info(report)
+        return report
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Registry shared by the whole process."""
+    return _registry
+
+
+def span(name: str):
+    return _registry.span(name)
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    _registry.count(name, value, **labels)
+
+
+def traced(prefix: str) -> Callable:
+    """Decorator timing every call of a function (sync or async) as span "prefix:name"."""
+
+    def decorator(func: Callable) -> Callable:
+        name = f"{prefix}:{func.__name__}"
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                with _registry.span(name):
+                    return await func(*args, **kwargs)
+
+        else:
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with _registry.span(name):
+                    return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -41,4 +41,19 @@ def parse_args() -> argparse.Namespace:
         help="File containing queries to classify (one per line)",
     )
 
+    options.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of queries classified concurrently in batch mode (default: 1)",
+    )
+
+    options.add_argument(
+        "--metrics-file",
+        type=str,
+        metavar="FILE",
+        help="Export timings and counters at the end (Prometheus text if .prom, else JSON)",
+    )
+
     return parser.parse_args()
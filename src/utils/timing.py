@@ -0,0 +1,33 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """Wall-clock time spent in each named stage of a pipeline, reported at the end."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        logger.info(f"▶️ Stage '{name}'")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self) -> str:
+        total = sum(self.durations.values())
+        lines = ["⏱️ Stage timings:"]
+        for name, duration in self.durations.items():
+            share = duration / total if total else 0.0
+            lines.append(f"  {name:<15} {duration:9.2f}s  {share:6.1%}")
+        lines.append(f"  {'total':<15} {total:9.2f}s")
+        report = "\n".join(lines)
+        logger.info(report)
+        return report